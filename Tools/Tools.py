@@ -10,9 +10,352 @@ References:
 - Das, B.M. (2010). Principles of Geotechnical Engineering. Cengage Learning.
 """
 
-from typing import Tuple, Dict
+import hashlib
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, Optional
 import numpy as np
 
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+try:
+    import cupy as cp
+    _CUPY_AVAILABLE = True
+except ImportError:
+    _CUPY_AVAILABLE = False
+
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _ZSTD_AVAILABLE = False
+
+# Leading bytes of a Zstandard frame, used by load_cache to pick the decoder
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Directory of the automatic disk memo and a salt for its keys: bump the version
+# whenever the kernels change their results so stale entries are not reused (the
+# app's persisted cache in calculations.py keys on it too)
+_MEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+_MEMO_VERSION = 2
+
+# Target size (bytes) of the broadcast temporaries built per block of the grid
+_BLOCK_BYTES = 512 * 1024
+
+# Depth-adaptive discretization: a subelement no larger than z / _SUBELEMENT_RATIO
+# is enough where the point-load kernel is smooth, so deep slices use fewer of them
+_SUBELEMENT_RATIO = 10.0
+
+# Grid size (points) from which backend='auto' moves the work to the GPU; below
+# it the host-device transfers and kernel launches cost more than they save
+_CUDA_MIN_POINTS = 1_000_000
+
+# Smallest depth handed to the kernels. Since R >= z > 0 the inner loops need no
+# singularity branch; grids start at max(0.1, 0.01 * Zmax) anyway
+_Z_MIN = 1e-6
+
+
+def _boussinesq_numpy(DX2, DY2, Z, dP, z_block=None):
+    """Superpose the subelement point loads with NumPy broadcasting, block by block"""
+    Nx, mx = DX2.shape
+    Ny, my = DY2.shape
+    Nz = len(Z)
+
+    # Broadcasting axes: (Nz, Ny, Nx, my, mx) -> summed over the subelement axes
+    dx2 = DX2.reshape(1, 1, Nx, 1, mx)
+    dy2 = DY2.reshape(1, Ny, 1, my, 1)
+
+    # Evaluate the grid in (z, y) blocks so the 5-D temporaries stay cache-sized
+    row_bytes = Nx * mx * my * DX2.itemsize
+    if z_block is None:
+        z_block = max(1, _BLOCK_BYTES // (Ny * row_bytes))
+    y_block = min(Ny, max(1, _BLOCK_BYTES // (z_block * row_bytes)))
+
+    # Constant factor of the point load solution, applied once per block
+    C = 3.0 * dP / (2.0 * np.pi)
+
+    sigma = np.empty((Nz, Ny, Nx), dtype=DX2.dtype)
+
+    def _slab(z0):
+        Zb = Z[z0:z0 + z_block].reshape(-1, 1, 1, 1, 1)
+        z2 = Zb * Zb
+        z3 = z2 * Zb
+        for y0 in range(0, Ny, y_block):
+            R2 = dx2 + dy2[:, y0:y0 + y_block] + z2
+            # Z starts above the surface, so R > 0 for every calculation point
+            # R^5 = R2 * R2 * sqrt(R2): one sqrt instead of a pow per element
+            contrib = z3 / (R2 * R2 * np.sqrt(R2))
+            sigma[z0:z0 + z_block, y0:y0 + y_block] = C * contrib.sum(axis=(3, 4))
+
+    # Depth slabs are independent and write disjoint parts of sigma; NumPy releases
+    # the GIL inside ufuncs, so threads scale with the number of cores
+    slabs = range(0, Nz, z_block)
+    workers = min(len(slabs), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_slab, slabs))
+    else:
+        for z0 in slabs:
+            _slab(z0)
+
+    return sigma
+
+
+def _newmark_corner(m, n):
+    """
+    Newmark influence factor for the corner of a uniformly loaded rectangle.
+
+    m and n are the rectangle sides divided by the depth. Signed values are allowed:
+    the factor is odd in each argument, which lets a point outside (or inside) the
+    loaded area be handled by signed superposition of four corner rectangles.
+    """
+    mn = m * n
+    s = np.sqrt(1.0 + m * m + n * n)
+    return (mn / s * (1.0 / (1.0 + m * m) + 1.0 / (1.0 + n * n)) + np.arctan(mn / s)) / (2.0 * np.pi)
+
+
+def _boussinesq_analytic(X, Y, Z, Lx, Ly, q, backend='cpu'):
+    """Closed-form stress under the centered Lx x Ly rectangle (Newmark/Fadum)"""
+    xp = np
+    if backend == 'cuda':
+        # Same broadcast as the NumPy path on device arrays: the np ufuncs in
+        # _newmark_corner dispatch to CuPy through __array_ufunc__
+        xp = cp
+        X, Y, Z = cp.asarray(X), cp.asarray(Y), cp.asarray(Z)
+    elif _NUMBA_AVAILABLE:
+        sigma = np.empty((len(Z), len(Y), len(X)), dtype=np.float32)
+        _boussinesq_analytic_kernel(np.ascontiguousarray(X, dtype=np.float64),
+                                    np.ascontiguousarray(Y, dtype=np.float64),
+                                    np.ascontiguousarray(Z, dtype=np.float64),
+                                    float(Lx), float(Ly), float(q), sigma)
+        return sigma
+    
+    Zb = Z.reshape(-1, 1, 1)
+    # Signed distances from each grid line to the load edges, scaled by depth
+    a1 = (-Lx / 2 - X.reshape(1, 1, -1)) / Zb
+    a2 = (Lx / 2 - X.reshape(1, 1, -1)) / Zb
+    b1 = (-Ly / 2 - Y.reshape(1, -1, 1)) / Zb
+    b2 = (Ly / 2 - Y.reshape(1, -1, 1)) / Zb
+
+    influence = (_newmark_corner(a2, b2) - _newmark_corner(a1, b2)
+                 - _newmark_corner(a2, b1) + _newmark_corner(a1, b1))
+    sigma = (q * influence).astype(xp.float32)
+    return cp.asnumpy(sigma) if xp is not np else sigma
+
+
+if _NUMBA_AVAILABLE:
+    # Explicit signature: compiled eagerly at import (and reloaded from the on-disk
+    # cache on later runs) instead of on the first call from the app
+    @njit('void(float32[:, ::1], float32[:, ::1], float32[::1], float64, float32[:, :, ::1])',
+          parallel=True, fastmath=True, cache=True)
+    def _boussinesq_kernel(DX2T, DY2, Z, dP, sigma):
+        """Fused superposition kernel: one thread per depth slice, one row accumulator each"""
+        Nz, Ny, Nx = sigma.shape
+        mx, my = DX2T.shape[0], DY2.shape[1]
+        C = 3.0 * dP / (2.0 * np.pi)
+        for iz in prange(Nz):
+            z2 = Z[iz] * Z[iz]
+            z3 = z2 * Z[iz]
+            acc = np.empty(Nx, dtype=np.float32)
+            for iy in range(Ny):
+                acc[:] = 0.0
+                for j in range(my):
+                    dyz2 = DY2[iy, j] + z2
+                    # Subelement loops outside, the x grid line innermost: each
+                    # DX2T row is read with stride 1 and the loop vectorizes over ix
+                    for i in range(mx):
+                        for ix in range(Nx):
+                            # R^-5 from a reciprocal square root, which fastmath
+                            # may lower to a hardware rsqrt estimate + Newton step
+                            inv_R = np.float32(1.0) / np.sqrt(DX2T[i, ix] + dyz2)
+                            inv_R2 = inv_R * inv_R
+                            acc[ix] += inv_R * inv_R2 * inv_R2
+                for ix in range(Nx):
+                    sigma[iz, iy, ix] = C * z3 * acc[ix]
+
+    _newmark_corner_nb = njit(inline='always', fastmath=True)(_newmark_corner)
+
+    @njit('void(float64[::1], float64[::1], float64[::1], float64, float64, float64, float32[:, :, ::1])',
+          parallel=True, fastmath=True, cache=True)
+    def _boussinesq_analytic_kernel(X, Y, Z, Lx, Ly, q, sigma):
+        """Fused closed form: the four corner factors of each point in one pass, no temporaries"""
+        Nz, Ny, Nx = sigma.shape
+        for iz in prange(Nz):
+            inv_z = 1.0 / Z[iz]
+            for iy in range(Ny):
+                b1 = (-Ly / 2 - Y[iy]) * inv_z
+                b2 = (Ly / 2 - Y[iy]) * inv_z
+                for ix in range(Nx):
+                    a1 = (-Lx / 2 - X[ix]) * inv_z
+                    a2 = (Lx / 2 - X[ix]) * inv_z
+                    sigma[iz, iy, ix] = q * (_newmark_corner_nb(a2, b2) - _newmark_corner_nb(a1, b2)
+                                             - _newmark_corner_nb(a2, b1) + _newmark_corner_nb(a1, b1))
+
+
+if _CUPY_AVAILABLE:
+    # One thread per grid point (16x16 threads per (x, y) tile, one tile row of
+    # blocks per depth), reducing over the subelements in registers. The DX2/DY2
+    # rows of the tile (at most 16 x 40 each) are staged once in shared memory
+    _BOUSSINESQ_CUDA = cp.RawKernel(r"""
+    #define TILE 16
+    #define MAX_SUB 40
+    extern "C" __global__
+    void boussinesq(const float* __restrict__ DX2, const float* __restrict__ DY2,
+                    const float* __restrict__ Z, const float C,
+                    const int Nx, const int Ny, const int mx, const int my,
+                    float* __restrict__ sigma)
+    {
+        __shared__ float sdx2[TILE * MAX_SUB];
+        __shared__ float sdy2[TILE * MAX_SUB];
+        const int x0 = blockIdx.x * TILE;
+        const int y0 = blockIdx.y * TILE;
+        const int t = threadIdx.y * TILE + threadIdx.x;
+        for (int k = t; k < TILE * mx; k += TILE * TILE) {
+            const int row = x0 + k / mx;
+            sdx2[k] = row < Nx ? __ldg(&DX2[row * mx + k % mx]) : 0.f;
+        }
+        for (int k = t; k < TILE * my; k += TILE * TILE) {
+            const int row = y0 + k / my;
+            sdy2[k] = row < Ny ? __ldg(&DY2[row * my + k % my]) : 0.f;
+        }
+        __syncthreads();
+        
+        const int ix = x0 + threadIdx.x;
+        const int iy = y0 + threadIdx.y;
+        const int iz = blockIdx.z;
+        if (ix >= Nx || iy >= Ny) return;
+        const float* dx2 = &sdx2[threadIdx.x * mx];
+        const float* dy2 = &sdy2[threadIdx.y * my];
+        const float z = Z[iz];
+        const float z2 = z * z;
+        float s = 0.f;
+        for (int j = 0; j < my; ++j) {
+            const float dyz2 = dy2[j] + z2;
+            for (int i = 0; i < mx; ++i) {
+                const float inv_R = rsqrtf(dx2[i] + dyz2);
+                const float inv_R2 = inv_R * inv_R;
+                s += inv_R * inv_R2 * inv_R2;
+            }
+        }
+        sigma[((size_t)iz * Ny + iy) * Nx + ix] = C * z2 * z * s;
+    }
+    """, 'boussinesq')
+
+
+def _cuda_available() -> bool:
+    """True when CuPy is installed and a CUDA device can be used"""
+    return _CUPY_AVAILABLE and cp.cuda.is_available()
+
+
+def _resolve_backend(backend: str, n_points: int) -> str:
+    """Turn backend='auto' into 'cuda' for grids above _CUDA_MIN_POINTS on a GPU, else 'cpu'"""
+    if backend != 'auto':
+        return backend
+    return 'cuda' if n_points > _CUDA_MIN_POINTS and _cuda_available() else 'cpu'
+
+
+def _boussinesq_cuda(DX2: np.ndarray, DY2: np.ndarray, Z: np.ndarray, dP: float) -> np.ndarray:
+    """Run the superposition on the GPU and copy sigma back to the host"""
+    Nx, mx = DX2.shape
+    Ny, my = DY2.shape
+    Nz = len(Z)
+    sigma_d = cp.empty((Nz, Ny, Nx), dtype=cp.float32)
+    block = (16, 16, 1)  # must match TILE in the kernel
+    grid = ((Nx + block[0] - 1) // block[0], (Ny + block[1] - 1) // block[1], Nz)
+    _BOUSSINESQ_CUDA(grid, block, (
+        cp.asarray(DX2), cp.asarray(DY2), cp.asarray(Z), np.float32(3.0 * dP / (2.0 * np.pi)),
+        np.int32(Nx), np.int32(Ny), np.int32(mx), np.int32(my), sigma_d
+    ))
+    return cp.asnumpy(sigma_d)
+
+
+def _mirror_quadrant(sigma_q: np.ndarray, hx: int, hy: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Rebuild the full grid from the half evaluated past index hx (x) and hy (y)"""
+    if hx == 0 and hy == 0:
+        if out is None or out is sigma_q:
+            return sigma_q
+        out[...] = sigma_q
+        return out
+    Nz, ny, nx = sigma_q.shape
+    Nx, Ny = nx + hx, ny + hy
+    sigma = np.empty((Nz, Ny, Nx), dtype=sigma_q.dtype) if out is None else out
+    sigma[:, hy:, hx:] = sigma_q
+    # On a symmetric linspace X[i] == -X[Nx - 1 - i], so the missing half is the
+    # evaluated one read backwards
+    sigma[:, hy:, :hx] = sigma[:, hy:, ::-1][:, :, :hx]
+    sigma[:, :hy, :] = sigma[:, ::-1, :][:, :hy, :]
+    return sigma
+
+
+def _superposition(X, Y, Z, Lx, Ly, q, mx, my, backend='auto', z_block=None, out=None):
+    """Sum the mx x my subelement point loads at every (Z, Y, X) grid point, into out if given"""
+    # Create subelement point loads
+    # Rectangular load is centered at origin, extending from -Lx/2 to Lx/2 and -Ly/2 to Ly/2
+    x_load = np.linspace(-Lx/2, Lx/2, mx + 1)
+    y_load = np.linspace(-Ly/2, Ly/2, my + 1)
+    
+    # Calculate area of each subelement
+    dx = Lx / mx
+    dy = Ly / my
+    dA = dx * dy
+    
+    # Point load magnitude for each subelement
+    dP = q * dA
+    
+    # Calculate centers of subelements
+    x_centers = (x_load[:-1] + x_load[1:]) / 2
+    y_centers = (y_load[:-1] + y_load[1:]) / 2
+    
+    # Squared horizontal offsets between grid lines and subelement centers,
+    # shared by every depth slice: DX2[ix, i] = (X[ix] - x_centers[i])**2
+    # The kernels work in contiguous float32 arrays: twice the SIMD lanes and half
+    # the memory traffic, far below the accuracy of the superposition itself
+    DX2 = np.ascontiguousarray((X[:, None] - x_centers[None, :])**2, dtype=np.float32)
+    DY2 = np.ascontiguousarray((Y[:, None] - y_centers[None, :])**2, dtype=np.float32)
+    Z32 = Z.astype(np.float32)
+    
+    # Compute stress contribution from each subelement
+    # Using Boussinesq's solution: sigma_z = (3*P*z^3) / (2*pi*R^5)
+    # 'auto' follows the same size threshold as the public entry points
+    backend = _resolve_backend(backend, len(X) * len(Y) * len(Z))
+    if backend == 'cuda':
+        sigma = _boussinesq_cuda(DX2, DY2, Z32, dP)
+    elif _NUMBA_AVAILABLE:
+        sigma = np.empty((len(Z), len(Y), len(X)), dtype=np.float32) if out is None else out
+        _boussinesq_kernel(np.ascontiguousarray(DX2.T), DY2, Z32, float(dP), sigma)
+    else:
+        sigma = _boussinesq_numpy(DX2, DY2, Z32, dP, z_block)
+    if out is not None and sigma is not out:
+        out[...] = sigma
+        sigma = out
+    return sigma
+
+
+def _adaptive_superposition(X, Y, Z, Lx, Ly, q, mx, my, backend='auto', z_block=None, out=None):
+    """Superposition with at most mx x my subelements, coarsened slice by slice with depth"""
+    # Subelement size ~z/10 but never finer than the grid-based mx, my nor coarser than 4
+    mx_z = np.minimum(mx, np.maximum(4, np.ceil(_SUBELEMENT_RATIO * Lx / Z))).astype(int)
+    my_z = np.minimum(my, np.maximum(4, np.ceil(_SUBELEMENT_RATIO * Ly / Z))).astype(int)
+    if out is None:
+        out = np.empty((len(Z), len(Y), len(X)), dtype=np.float32)
+    # Resolved on the whole grid, so every run of depths uses the same backend
+    backend = _resolve_backend(backend, len(X) * len(Y) * len(Z))
+    
+    # One kernel call per run of consecutive depths sharing the same discretization
+    start = 0
+    for iz in range(1, len(Z) + 1):
+        if iz == len(Z) or mx_z[iz] != mx_z[start] or my_z[iz] != my_z[start]:
+            _superposition(X, Y, Z[start:iz], Lx, Ly, q, int(mx_z[start]), int(my_z[start]),
+                           backend, z_block, out=out[start:iz])
+            start = iz
+    return out
+
 
 def compute_rectangular_boussinesq(
     q: float,
@@ -25,7 +368,12 @@ def compute_rectangular_boussinesq(
     Zmax: float,
     Nx: int,
     Ny: int,
-    Nz: int
+    Nz: int,
+    z_block: Optional[int] = None,
+    method: str = 'superposition',
+    backend: str = 'auto',
+    out_path: Optional[str] = None,
+    out: Optional[np.ndarray] = None
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """
     Compute vertical stress (sigma_z) generated by a rectangular surface load using
@@ -40,7 +388,21 @@ def compute_rectangular_boussinesq(
         sigma_z = (3*P*z^3) / (2*pi*R^5)
         where R = sqrt(x^2 + y^2 + z^2)
     
+    The point loads lie on the surface, so R >= z: the depth grid starts at
+    Z[0] = max(0.1, 0.01 * Zmax) > 0, which is the only singularity guard (the
+    kernels are branch-free).
+    
     Computational cost: O(Nx * Ny * Nz * mx * my) where mx, my are the number of subelements.
+    Deeper slices, where the kernel is smooth over a subelement, use fewer of them
+    (subelement size about z/10, at least 4 x 4), which cuts the cost of deep grids.
+    
+    With method='analytic' the integral over the rectangle is evaluated in closed form
+    (Newmark's corner influence factor, superposed over four corner rectangles for each
+    point), which is exact and costs O(Nx * Ny * Nz).
+    
+    The load is centered at the origin, so when the domain is symmetric about x = 0
+    (Xmin == -Xmax) or y = 0 (Ymin == -Ymax) only the non-negative half of that axis is
+    evaluated and mirrored, up to 4x less work for the usual centered domain.
     
     Recommendations:
     - Use mx = my = min(40, max(4, Nx)) for reasonable accuracy vs performance
@@ -59,16 +421,33 @@ def compute_rectangular_boussinesq(
         Nx: Number of points in X direction (must be >= 2)
         Ny: Number of points in Y direction (must be >= 2)
         Nz: Number of points in Z direction (must be >= 2)
+        z_block: Number of depth slices evaluated per block by the NumPy fallback
+            (used when Numba is not installed). By default it is chosen so the
+            temporaries of each block stay around 512 KB (cache-sized)
+        method: 'superposition' (default) sums point loads over subelements;
+            'analytic' uses the closed-form Newmark solution
+        backend: Where the kernels run: 'cpu' (Numba or NumPy), 'cuda' (CuPy
+            on the GPU) or 'auto' (default), which uses the GPU for grids of
+            more than 1e6 points when CuPy and a CUDA device are available
+        out_path: If given, sigma is written to a raw float32 np.memmap at this
+            path (created or overwritten) and returned memory-mapped, so large
+            grids live in the OS page cache instead of the process heap. Reopen
+            it with np.memmap(out_path, dtype=np.float32, mode='r', shape=(Nz, Ny, Nx))
+        out: Optional preallocated C-contiguous float32 array of shape
+            (Nz, Ny, Nx), overwritten with sigma and returned, e.g. to reuse
+            one buffer across recomputations of the same grid. Cannot be
+            combined with out_path
     
     Returns:
         Tuple containing:
         - X: np.ndarray of shape (Nx,) with X coordinates in meters
         - Y: np.ndarray of shape (Ny,) with Y coordinates in meters
         - Z: np.ndarray of shape (Nz,) with Z coordinates (depth) in meters
-        - sigma: np.ndarray of shape (Nz, Ny, Nx) with vertical stress in kPa
+        - sigma: np.ndarray (float32) of shape (Nz, Ny, Nx) with vertical stress in kPa
     
     Raises:
         ValueError: If input parameters are invalid or inconsistent
+        RuntimeError: If backend='cuda' and no CUDA device is available
     
     Example:
         >>> X, Y, Z, sigma = compute_rectangular_boussinesq(
@@ -92,6 +471,19 @@ def compute_rectangular_boussinesq(
         raise ValueError(f"Grid dimensions must be at least 2, got Nx={Nx}, Ny={Ny}, Nz={Nz}")
     if Nx > 1000 or Ny > 1000 or Nz > 1000:
         raise ValueError(f"Grid dimensions too large (max 1000), got Nx={Nx}, Ny={Ny}, Nz={Nz}")
+    if method not in ('superposition', 'analytic'):
+        raise ValueError(f"Method must be 'superposition' or 'analytic', got {method!r}")
+    if backend not in ('auto', 'cpu', 'cuda'):
+        raise ValueError(f"Backend must be 'auto', 'cpu' or 'cuda', got {backend!r}")
+    if backend == 'cuda' and not _cuda_available():
+        raise RuntimeError("backend='cuda' requires CuPy and a CUDA device")
+    if out is not None:
+        if out_path is not None:
+            raise ValueError("out and out_path cannot be used together")
+        if (out.shape != (Nz, Ny, Nx) or out.dtype != np.float32
+                or not out.flags.c_contiguous or not out.flags.writeable):
+            raise ValueError(f"out must be a writeable C-contiguous float32 array of shape "
+                             f"{(Nz, Ny, Nx)}, got {out.dtype} {out.shape}")
     
     # Create coordinate arrays
     X = np.linspace(Xmin, Xmax, Nx)
@@ -101,83 +493,273 @@ def compute_rectangular_boussinesq(
     z_start = max(0.1, Zmax * 0.01)
     Z = np.linspace(z_start, Zmax, Nz)
     
+    # The load is centered at the origin, so sigma is even in x and in y. On a
+    # symmetric axis only its non-negative half is evaluated and then mirrored
+    hx = Nx // 2 if np.isclose(Xmin, -Xmax) else 0
+    hy = Ny // 2 if np.isclose(Ymin, -Ymax) else 0
+    Xe, Ye = X[hx:], Y[hy:]
+    backend = _resolve_backend(backend, Nx * Ny * Nz)
+    
+    # Optional caller-provided or disk-backed output, filled in place by the kernels below
+    sigma = out
+    if out_path is not None:
+        sigma = np.memmap(out_path, dtype=np.float32, mode='w+', shape=(Nz, Ny, Nx))
+    
+    if method == 'analytic':
+        sigma = _mirror_quadrant(_boussinesq_analytic(Xe, Ye, Z, Lx, Ly, q, backend), hx, hy, out=sigma)
+        if out_path is not None:
+            sigma.flush()
+        return X, Y, Z, sigma
+    
     # Determine subelement discretization
-    # Use adaptive discretization based on grid resolution
+    # Use adaptive discretization based on grid resolution, coarsened with depth
+    # down to subelements of about z/10 (see _adaptive_superposition)
     mx = min(40, max(4, Nx // 2))
     my = min(40, max(4, Ny // 2))
     
-    # Create subelement point loads
-    # Rectangular load is centered at origin, extending from -Lx/2 to Lx/2 and -Ly/2 to Ly/2
-    x_load = np.linspace(-Lx/2, Lx/2, mx + 1)
-    y_load = np.linspace(-Ly/2, Ly/2, my + 1)
+    # Without mirroring the kernels write straight into the output buffer
+    sigma_e = _adaptive_superposition(Xe, Ye, Z, Lx, Ly, q, mx, my, backend, z_block,
+                                      out=sigma if hx == 0 and hy == 0 else None)
+    sigma = _mirror_quadrant(sigma_e, hx, hy, out=sigma)
+    if out_path is not None:
+        sigma.flush()
+    return X, Y, Z, sigma
+
+
+def _section_inputs(q, Lx, Ly, Z, mx, my, method, backend, **coords):
+    """Validate the inputs of the profile/slice entry points and return them as arrays"""
+    if q < 0:
+        raise ValueError(f"Load q must be non-negative, got {q}")
+    if Lx <= 0 or Ly <= 0:
+        raise ValueError(f"Load dimensions must be positive, got Lx={Lx}, Ly={Ly}")
+    if not (1 <= mx <= 40 and 1 <= my <= 40):
+        raise ValueError(f"Subelement counts must be between 1 and 40, got mx={mx}, my={my}")
+    if method not in ('superposition', 'analytic'):
+        raise ValueError(f"Method must be 'superposition' or 'analytic', got {method!r}")
+    if backend not in ('auto', 'cpu', 'cuda'):
+        raise ValueError(f"Backend must be 'auto', 'cpu' or 'cuda', got {backend!r}")
+    if backend == 'cuda' and not _cuda_available():
+        raise RuntimeError("backend='cuda' requires CuPy and a CUDA device")
+    Z = np.atleast_1d(np.asarray(Z, dtype=np.float64))
+    if Z.ndim != 1 or np.any(Z <= 0):
+        raise ValueError("Z must be a 1-D array of positive depths")
+    # The kernels have no R > 0 branch: keep z2 from underflowing in float32
+    Z = np.maximum(Z, _Z_MIN)
+    arrays = [np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in coords.values()]
+    for name, v in zip(coords, arrays):
+        if v.ndim != 1:
+            raise ValueError(f"{name} must be a scalar or a 1-D array")
+    return Z, arrays
+
+
+def _section(q, Lx, Ly, X, Y, Z, mx, my, method, backend):
+    """sigma of shape (len(Z), len(Y), len(X)) at arbitrary grid lines"""
+    backend = _resolve_backend(backend, len(X) * len(Y) * len(Z))
+    if method == 'analytic':
+        return _boussinesq_analytic(X, Y, Z, Lx, Ly, q, backend)
+    return _adaptive_superposition(X, Y, Z, Lx, Ly, q, mx, my, backend)
+
+
+def compute_boussinesq_profile(
+    q: float,
+    Lx: float,
+    Ly: float,
+    x0: float,
+    y0: float,
+    Z: np.ndarray,
+    mx: int = 40,
+    my: int = 40,
+    method: str = 'superposition',
+    backend: str = 'auto'
+) -> np.ndarray:
+    """
+    Compute sigma_z along the vertical through (x0, y0) only.
     
-    # Calculate area of each subelement
-    dx = Lx / mx
-    dy = Ly / my
-    dA = dx * dy
+    Same solution as compute_rectangular_boussinesq, but evaluated at the Nz
+    requested depths instead of the full Nx x Ny x Nz grid.
     
-    # Point load magnitude for each subelement
-    dP = q * dA
+    Args:
+        q, Lx, Ly: Load intensity (kPa) and dimensions (m), as in compute_rectangular_boussinesq
+        x0, y0: Horizontal position of the profile (meters)
+        Z: Depths in meters (must be > 0)
+        mx, my: Subelements of the load in X and Y near the surface (1 to 40,
+            superposition only), coarsened with depth as in compute_rectangular_boussinesq
+        method, backend: As in compute_rectangular_boussinesq
     
-    # Calculate centers of subelements
-    x_centers = (x_load[:-1] + x_load[1:]) / 2
-    y_centers = (y_load[:-1] + y_load[1:]) / 2
+    Returns:
+        np.ndarray of shape (Nz,) with sigma_z in kPa (float32)
     
-    # Initialize stress array with shape (Nz, Ny, Nx)
-    sigma = np.zeros((Nz, Ny, Nx))
+    Raises:
+        ValueError: If input parameters are invalid
     
-    # Compute stress contribution from each subelement
-    # Using Boussinesq's solution: sigma_z = (3*P*z^3) / (2*pi*R^5)
-    for i, x_sub in enumerate(x_centers):
-        for j, y_sub in enumerate(y_centers):
-            # Create 3D meshgrid for this subelement
-            # Broadcasting: X(Nx,), Y(Ny,), Z(Nz,) -> grids of shape matching output
-            for iz, z in enumerate(Z):
-                for iy, y in enumerate(Y):
-                    for ix, x in enumerate(X):
-                        # Distance from subelement to calculation point
-                        dx_point = x - x_sub
-                        dy_point = y - y_sub
-                        R = np.sqrt(dx_point**2 + dy_point**2 + z**2)
-                        
-                        # Avoid division by zero
-                        if R > 1e-10:
-                            # Boussinesq formula for point load
-                            sigma_z = (3 * dP * z**3) / (2 * np.pi * R**5)
-                            sigma[iz, iy, ix] += sigma_z
+    Example:
+        >>> Z = np.linspace(0.3, 30, 31)
+        >>> sigma = compute_boussinesq_profile(100, 10, 10, 0, 0, Z)
+    """
+    Z, (x, y) = _section_inputs(q, Lx, Ly, Z, mx, my, method, backend, x0=x0, y0=y0)
+    return _section(q, Lx, Ly, x[:1], y[:1], Z, mx, my, method, backend)[:, 0, 0]
+
+
+def compute_boussinesq_slice_xz(
+    q: float,
+    Lx: float,
+    Ly: float,
+    y0: float,
+    X: np.ndarray,
+    Z: np.ndarray,
+    mx: int = 40,
+    my: int = 40,
+    method: str = 'superposition',
+    backend: str = 'auto'
+) -> np.ndarray:
+    """
+    Compute sigma_z on the vertical X-Z plane at Y = y0 only.
     
-    return X, Y, Z, sigma
+    Args:
+        q, Lx, Ly: Load intensity (kPa) and dimensions (m), as in compute_rectangular_boussinesq
+        y0: Y coordinate of the plane (meters)
+        X: X coordinates in meters
+        Z: Depths in meters (must be > 0)
+        mx, my: Subelements of the load in X and Y near the surface (1 to 40,
+            superposition only), coarsened with depth as in compute_rectangular_boussinesq
+        method, backend: As in compute_rectangular_boussinesq
+    
+    Returns:
+        np.ndarray of shape (Nz, Nx) with sigma_z in kPa (float32)
+    
+    Raises:
+        ValueError: If input parameters are invalid
+    """
+    Z, (X, y) = _section_inputs(q, Lx, Ly, Z, mx, my, method, backend, X=X, y0=y0)
+    return _section(q, Lx, Ly, X, y[:1], Z, mx, my, method, backend)[:, 0, :]
+
+
+def compute_boussinesq_slice_yz(
+    q: float,
+    Lx: float,
+    Ly: float,
+    x0: float,
+    Y: np.ndarray,
+    Z: np.ndarray,
+    mx: int = 40,
+    my: int = 40,
+    method: str = 'superposition',
+    backend: str = 'auto'
+) -> np.ndarray:
+    """
+    Compute sigma_z on the vertical Y-Z plane at X = x0 only.
+    
+    Args:
+        q, Lx, Ly: Load intensity (kPa) and dimensions (m), as in compute_rectangular_boussinesq
+        x0: X coordinate of the plane (meters)
+        Y: Y coordinates in meters
+        Z: Depths in meters (must be > 0)
+        mx, my: Subelements of the load in X and Y near the surface (1 to 40,
+            superposition only), coarsened with depth as in compute_rectangular_boussinesq
+        method, backend: As in compute_rectangular_boussinesq
+    
+    Returns:
+        np.ndarray of shape (Nz, Ny) with sigma_z in kPa (float32)
+    
+    Raises:
+        ValueError: If input parameters are invalid
+    """
+    Z, (Y, x) = _section_inputs(q, Lx, Ly, Z, mx, my, method, backend, Y=Y, x0=x0)
+    return _section(q, Lx, Ly, x[:1], Y, Z, mx, my, method, backend)[:, :, 0]
 
 
-def save_cache(path: str, data: Dict[str, np.ndarray]) -> None:
+def save_cache(path: str, data: Dict[str, np.ndarray], compression: str = 'zip') -> None:
     """
-    Save computed data to a compressed numpy archive.
+    Save computed data to a numpy archive.
     
     Args:
         path: File path for the cache file (should end with .npz)
         data: Dictionary containing numpy arrays to save
               Expected keys: 'X', 'Y', 'Z', 'sigma'
+        compression: 'zip' (default) writes a DEFLATE-compressed .npz,
+            'none' an uncompressed .npz (fastest on a local disk) and 'zstd'
+            an .npz wrapped in a multithreaded Zstandard frame (requires the
+            zstandard package)
+    
+    Raises:
+        ValueError: If compression is not one of 'zip', 'none' or 'zstd'
+        ImportError: If compression='zstd' and zstandard is not installed
     
     Example:
         >>> data = {'X': X, 'Y': Y, 'Z': Z, 'sigma': sigma}
         >>> save_cache('Tools/cache/boussinesq_result.npz', data)
     """
+    if compression not in ('zip', 'none', 'zstd'):
+        raise ValueError(f"Compression must be 'zip', 'none' or 'zstd', got {compression!r}")
+    if compression == 'zstd' and not _ZSTD_AVAILABLE:
+        raise ImportError("compression='zstd' requires the zstandard package")
+    
     import os
     # Ensure cache directory exists
     cache_dir = os.path.dirname(path)
     if cache_dir and not os.path.exists(cache_dir):
         os.makedirs(cache_dir, exist_ok=True)
     
-    # Save using compressed format
-    np.savez_compressed(path, **data)
+    # Write next to the target and rename, so a reader (or a memory map of the
+    # previous file) never sees a half-written archive. Writing through a file
+    # object also keeps numpy from appending a second .npz to the name
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            if compression == 'zip':
+                np.savez_compressed(f, **data)
+            elif compression == 'none':
+                np.savez(f, **data)
+            else:
+                buf = io.BytesIO()
+                np.savez(buf, **data)
+                f.write(zstandard.ZstdCompressor(level=3, threads=-1).compress(buf.getvalue()))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
+def _npz_memmap(path: str, mmap_mode: str) -> Optional[Dict[str, np.ndarray]]:
+    """Memory-map the members of an uncompressed .npz, or None if that is not possible"""
+    header_readers = {(1, 0): np.lib.format.read_array_header_1_0,
+                      (2, 0): np.lib.format.read_array_header_2_0}
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED or not info.filename.endswith('.npy'):
+                return None
+            # Skip the local file header (30 bytes + name + extra field) to the .npy
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(f)
+            if version not in header_readers:
+                return None
+            shape, fortran_order, dtype = header_readers[version](f)
+            if dtype.hasobject:
+                return None
+            arrays[info.filename[:-4]] = np.memmap(
+                path, dtype=dtype, mode=mmap_mode, offset=f.tell(), shape=shape,
+                order='F' if fortran_order else 'C'
+            )
+    return arrays
 
-def load_cache(path: str) -> Dict[str, np.ndarray]:
+
+def load_cache(path: str, mmap_mode: Optional[str] = None) -> Dict[str, np.ndarray]:
     """
     Load cached data from a numpy archive.
     
+    The format written by save_cache (zip, none or zstd) is detected from the
+    leading bytes of the file.
+    
     Args:
         path: File path to the cache file (.npz format)
+        mmap_mode: If given ('r', 'c' or 'r+', as in np.load), the arrays of an
+            uncompressed archive (compression='none') are memory-mapped from the
+            file instead of read, so only the slices actually used are loaded.
+            Compressed archives are read into memory as usual
     
     Returns:
         Dictionary containing the loaded numpy arrays
@@ -185,6 +767,7 @@ def load_cache(path: str) -> Dict[str, np.ndarray]:
     
     Raises:
         FileNotFoundError: If the cache file does not exist
+        ImportError: If the file is Zstandard-compressed and zstandard is not installed
     
     Example:
         >>> data = load_cache('Tools/cache/boussinesq_result.npz')
@@ -194,15 +777,83 @@ def load_cache(path: str) -> Dict[str, np.ndarray]:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Cache file not found: {path}")
     
+    with open(path, 'rb') as f:
+        magic = f.read(len(_ZSTD_MAGIC))
+    
+    if mmap_mode is not None and magic[:2] == b'PK':
+        data = _npz_memmap(path, mmap_mode)
+        if data is not None:
+            return data
+    
     # Load the archive
-    archive = np.load(path)
+    if magic == _ZSTD_MAGIC:
+        if not _ZSTD_AVAILABLE:
+            raise ImportError(f"Cache file {path} is Zstandard-compressed; install zstandard to read it")
+        with open(path, 'rb') as f:
+            raw = zstandard.ZstdDecompressor().decompress(f.read())
+        archive = np.load(io.BytesIO(raw))
+    else:
+        archive = np.load(path)
     
     # Convert to regular dictionary
-    data = {key: archive[key] for key in archive.files}
+    with archive:
+        data = {key: archive[key] for key in archive.files}
     
     return data
 
 
+def compute_rectangular_boussinesq_memoized(
+    q: float,
+    Lx: float,
+    Ly: float,
+    Xmin: float,
+    Xmax: float,
+    Ymin: float,
+    Ymax: float,
+    Zmax: float,
+    Nx: int,
+    Ny: int,
+    Nz: int,
+    method: str = 'superposition',
+    cache_dir: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Disk-memoized compute_rectangular_boussinesq.
+    
+    The inputs are hashed (BLAKE2b) into a file name under cache_dir; on a hit
+    the stored grid is memory-mapped (read-only) instead of recomputed, on a miss
+    the result is computed and written uncompressed.
+    
+    Args:
+        q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, method: As in
+            compute_rectangular_boussinesq
+        cache_dir: Directory of the memo files (default: Tools/cache)
+    
+    Returns:
+        Tuple (X, Y, Z, sigma), as returned by compute_rectangular_boussinesq
+    
+    Example:
+        >>> X, Y, Z, sigma = compute_rectangular_boussinesq_memoized(
+        ...     100, 10, 10, -20, 20, -20, 20, 30, 41, 41, 31)
+    """
+    # Normalize the numeric types so that e.g. q=100 and q=100.0 share an entry
+    params = (_MEMO_VERSION, float(q), float(Lx), float(Ly), float(Xmin), float(Xmax),
+              float(Ymin), float(Ymax), float(Zmax), int(Nx), int(Ny), int(Nz), method)
+    key = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+    path = os.path.join(cache_dir or _MEMO_DIR, f'auto_{key}.npz')
+    
+    if os.path.exists(path):
+        # Stored uncompressed, so sigma is memory-mapped rather than read
+        data = load_cache(path, mmap_mode='r')
+        return data['X'], data['Y'], data['Z'], data['sigma']
+    
+    X, Y, Z, sigma = compute_rectangular_boussinesq(
+        q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, method=method
+    )
+    save_cache(path, {'X': X, 'Y': Y, 'Z': Z, 'sigma': sigma}, compression='none')
+    return X, Y, Z, sigma
+
+
 def calc_circular_surcharge(
     q: float,
     radius: float,
@@ -253,51 +904,34 @@ def calc_circular_surcharge(
     # Calculate radial distance from center of loaded area
     r = np.sqrt(x_center**2 + y_center**2)
     
-    # Initialize stress array
-    sigma_z = np.zeros_like(z_values)
-    
-    # Calculate stress for each depth
-    for i, z in enumerate(z_values):
-        if r == 0:
-            # On axis (r=0): analytical solution
-            # sigma_z = q * [1 - (z^3) / (z^2 + R^2)^(3/2)]
-            term = z**3 / (z**2 + radius**2)**(3/2)
-            sigma_z[i] = q * (1 - term)
-        else:
-            # Off axis (r>0): use simplified approximation
-            # Discretize circular load into ring elements and integrate
-            n_rings = 20  # Number of ring elements for integration
-            ring_radii = np.linspace(0, radius, n_rings + 1)
-            
-            stress_sum = 0.0
-            for j in range(n_rings):
-                r_inner = ring_radii[j]
-                r_outer = ring_radii[j + 1]
-                r_ring = (r_inner + r_outer) / 2  # Center of ring
-                
-                # Area of ring element
-                area_ring = np.pi * (r_outer**2 - r_inner**2)
-                
-                # Point load from this ring element
-                dP = q * area_ring
-                
-                # Distance from ring to calculation point (approximate)
-                # For each ring, integrate around circumference
-                n_theta = 12  # Points around circumference
-                for k in range(n_theta):
-                    theta = 2 * np.pi * k / n_theta
-                    x_load = r_ring * np.cos(theta)
-                    y_load = r_ring * np.sin(theta)
-                    
-                    # Distance from load point to calculation point
-                    dx = x_center - x_load
-                    dy = y_center - y_load
-                    R = np.sqrt(dx**2 + dy**2 + z**2)
-                    
-                    # Boussinesq point load solution (divide by n_theta for averaging)
-                    if R > 1e-10:
-                        stress_sum += (3 * (dP / n_theta) * z**3) / (2 * np.pi * R**5)
-            
-            sigma_z[i] = stress_sum
+    z = np.asarray(z_values, dtype=np.float64)
+    
+    if r == 0:
+        # On axis (r=0): analytical solution, for every depth at once
+        # sigma_z = q * [1 - (z^3) / (z^2 + R^2)^(3/2)]
+        return z_values, q * (1 - (z**2 / (z**2 + radius**2))**1.5)
+    
+    # Off axis (r>0): use simplified approximation
+    # Discretize circular load into ring elements and integrate
+    n_rings = 20  # Number of ring elements for integration
+    n_theta = 12  # Points around circumference
+    ring_radii = np.linspace(0, radius, n_rings + 1)
+    r_ring = (ring_radii[:-1] + ring_radii[1:]) / 2  # Center of each ring
+    
+    # Point load of each ring element, shared by its n_theta points, and the
+    # Boussinesq factor 3*P/(2*pi) of each of them
+    dP = q * np.pi * (ring_radii[1:]**2 - ring_radii[:-1]**2) / n_theta
+    C = np.repeat(3.0 * dP / (2.0 * np.pi), n_theta)
+    
+    # Load points (ring-major) and their squared horizontal distance to the point
+    theta = 2.0 * np.pi * np.arange(n_theta) / n_theta
+    dx = x_center - np.outer(r_ring, np.cos(theta)).ravel()
+    dy = y_center - np.outer(r_ring, np.sin(theta)).ravel()
+    h2 = dx * dx + dy * dy
+    
+    # All depths x all load points in one broadcast (z > 0, so R never vanishes)
+    z2 = z[:, None]**2
+    R2 = h2[None, :] + z2
+    sigma_z = z**3 * (C / (R2 * R2 * np.sqrt(R2))).sum(axis=1)
     
     return z_values, sigma_z
@@ -1,6 +1,10 @@
 """
 Tools package for geotechnical calculations
 """
-from .Tools import compute_rectangular_boussinesq, save_cache, load_cache, calc_circular_surcharge
+from .Tools import (compute_rectangular_boussinesq, compute_rectangular_boussinesq_memoized,
+                    compute_boussinesq_profile, compute_boussinesq_slice_xz, compute_boussinesq_slice_yz,
+                    save_cache, load_cache, calc_circular_surcharge)
 
-__all__ = ['compute_rectangular_boussinesq', 'save_cache', 'load_cache', 'calc_circular_surcharge']
+__all__ = ['compute_rectangular_boussinesq', 'compute_rectangular_boussinesq_memoized',
+           'compute_boussinesq_profile', 'compute_boussinesq_slice_xz', 'compute_boussinesq_slice_yz',
+           'save_cache', 'load_cache', 'calc_circular_surcharge']
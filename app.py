@@ -3,90 +3,260 @@ Geotechnical Tools - Simple Streamlit App
 Aplicación para análisis de datos geotécnicos
 """
 
+import uuid
 import streamlit as st
 from Tools import save_cache, load_cache, calc_circular_surcharge
 from calculations import (
     get_cache_hash,
     compute_boussinesq_cached,
-    create_xz_plot,
-    create_yz_plot,
-    create_depth_profile_plot,
+    PlotBatch,
+    create_plots,
+    render_figures_png,
+    log_stress,
     generate_pdf_report
 )
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 
-
-def boussinesq_interface():
-    """Render Boussinesq calculation interface in sidebar and main content"""
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("⚙️ Parámetros de Cálculo")
-
-    # Initialize session state
-    if 'boussinesq_data' not in st.session_state:
-        st.session_state.boussinesq_data = None
-    if 'plots' not in st.session_state:
-        st.session_state.plots = []
-
-    # Input parameters
-    with st.sidebar.expander("Parámetros de Carga", expanded=True):
-        q = st.number_input("Sobrecarga q (kPa)", min_value=0.0, value=100.0, step=10.0)
-        col1, col2 = st.columns(2)
+# Figures kept in the per-session plot memo; the oldest ones not on screen are
+# dropped beyond it, so toggling through many slices does not grow it unbounded
+_PLOT_MEMO_MAX = 64
+
+
+def _plot_figures(data, requests, log_scale=False):
+    """Figures for the (type, x_idx, y_idx) requests, building only those not memoized yet"""
+    # Per-plot memo for the current data set: adding, removing or reordering plots
+    # reuses every figure already built. data_id is a fresh UUID each time
+    # st.session_state.boussinesq_data is replaced, which drops the old figures
+    memo = st.session_state.get('plot_figs')
+    if memo is None or memo['data_id'] != data['data_id']:
+        memo = st.session_state.plot_figs = {'data_id': data['data_id'], 'figs': {}}
+    figs = memo['figs']
+    keys = [(log_scale, *r) for r in requests]
+
+    # The misses are still built together, one slice gather per plot type
+    missing = list(dict.fromkeys(k for k in keys if k not in figs))
+    if missing:
+        if log_scale:
+            # One log10 pass per data set, shared by every log-scale plot; done on
+            # first use so that linear-only sessions (and memory-mapped caches) skip it
+            if 'log_sigma' not in data:
+                data['log_sigma'] = log_stress(data['sigma'])
+            values = data['log_sigma']
+        else:
+            values = data['sigma']
+        figs.update(zip(missing, create_plots(data['X'], data['Y'], data['Z'], values,
+                                              [k[1:] for k in missing], log_scale=log_scale)))
+
+        # Evict in insertion order, keeping every figure requested now. Their PNGs
+        # go too: they are keyed on id(fig), which a new figure could reuse
+        wanted = set(keys)
+        stale = [k for k in figs if k not in wanted][:max(0, len(figs) - _PLOT_MEMO_MAX)]
+        pngs = memo.get('pngs', {})
+        for k in stale:
+            pngs.pop(id(figs.pop(k)), None)
+    return [figs[k] for k in keys]
+
+
+def _plot_images(figs):
+    """PNGs of figures from _plot_figures, rasterizing only those not rendered before; None without Kaleido"""
+    # Keyed on the memoized figure objects: they live in st.session_state.plot_figs
+    # until the data set changes, which also drops these images
+    pngs = st.session_state.plot_figs.setdefault('pngs', {})
+    missing = list({id(fig): fig for fig in figs if id(fig) not in pngs}.values())
+    if missing:
+        images = render_figures_png(missing)
+        if images is None:
+            return None
+        pngs.update(zip(map(id, missing), images))
+    return [pngs[id(fig)] for fig in figs]
+
+
+def _grid_stats(X, Y, sigma):
+    """Axis extents and sigma range used by the widgets and metrics, computed once per data set"""
+    return {'X_min': float(X.min()), 'X_max': float(X.max()),
+            'Y_min': float(Y.min()), 'Y_max': float(Y.max()),
+            'sigma_min': float(sigma.min()), 'sigma_max': float(sigma.max())}
+
+
+@st.fragment
+def _plots_section(data):
+    """Plot controls, saved plots and PDF export; reruns on its own when its widgets change"""
+    X, Y, Z, sigma = data['X'], data['Y'], data['Z'], data['sigma']
+    stats = data['stats']
+
+    # Plot controls
+    st.subheader("📈 Visualización")
+
+    # Add plot controls
+    plot_type = st.selectbox("Tipo de gráfica",
+                             ["Corte X-Z", "Corte Y-Z", "Perfil en profundidad"])
+
+    col1, col2, col3 = st.columns(3)
+
+    if plot_type == "Corte X-Z":
         with col1:
-            Lx = st.number_input("Lx (m)", min_value=0.1, value=10.0, step=1.0)
+            y_val = st.number_input("Valor de Y (m)",
+                                    min_value=stats['Y_min'],
+                                    max_value=stats['Y_max'],
+                                    value=0.0)
         with col2:
-            Ly = st.number_input("Ly (m)", min_value=0.1, value=10.0, step=1.0)
+            if st.button("➕ Agregar gráfica"):
+                st.session_state.plots.append({'type': plot_type, 'y_val': y_val})
 
-    with st.sidebar.expander("Dominio de Cálculo", expanded=True):
-        col1, col2 = st.columns(2)
+    elif plot_type == "Corte Y-Z":
         with col1:
-            Xmin = st.number_input("Xmin (m)", value=-20.0, step=1.0)
-            Ymin = st.number_input("Ymin (m)", value=-20.0, step=1.0)
+            x_val = st.number_input("Valor de X (m)",
+                                    min_value=stats['X_min'],
+                                    max_value=stats['X_max'],
+                                    value=0.0)
         with col2:
-            Xmax = st.number_input("Xmax (m)", value=20.0, step=1.0)
-            Ymax = st.number_input("Ymax (m)", value=20.0, step=1.0)
-        Zmax = st.number_input("Profundidad máx Z (m)", min_value=0.1, value=30.0, step=5.0)
+            if st.button("➕ Agregar gráfica"):
+                st.session_state.plots.append({'type': plot_type, 'x_val': x_val})
 
-    with st.sidebar.expander("Resolución de Malla", expanded=True):
-        col1, col2, col3 = st.columns(3)
+    elif plot_type == "Perfil en profundidad":
         with col1:
-            Nx = st.number_input("Nx", min_value=2, max_value=200, value=41, step=5)
+            x_point = st.number_input("X (m)",
+                                      min_value=stats['X_min'],
+                                      max_value=stats['X_max'],
+                                      value=0.0)
         with col2:
-            Ny = st.number_input("Ny", min_value=2, max_value=200, value=41, step=5)
+            y_point = st.number_input("Y (m)",
+                                      min_value=stats['Y_min'],
+                                      max_value=stats['Y_max'],
+                                      value=0.0)
         with col3:
-            Nz = st.number_input("Nz", min_value=2, max_value=200, value=31, step=5)
-
-    # Calculation buttons
-    st.sidebar.markdown("---")
-    col1, col2 = st.sidebar.columns(2)
+            if st.button("➕ Agregar gráfica"):
+                st.session_state.plots.append({'type': plot_type, 'x_point': x_point, 'y_point': y_point})
 
+    # Plot management buttons
+    col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
-        if st.button("🔄 Calcular", use_container_width=True):
-            with st.spinner("Calculando esfuerzos..."):
-                try:
-                    X, Y, Z, sigma = compute_boussinesq_cached(
-                        q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz
-                    )
-                    st.session_state.boussinesq_data = {
-                        'X': X, 'Y': Y, 'Z': Z, 'sigma': sigma,
-                        'params': {'q': q, 'Lx': Lx, 'Ly': Ly, 'Xmin': Xmin, 'Xmax': Xmax,
-                                   'Ymin': Ymin, 'Ymax': Ymax, 'Zmax': Zmax, 'Nx': Nx, 'Ny': Ny, 'Nz': Nz}
-                    }
-                    st.sidebar.success("✅ Cálculo completado")
-                except Exception as e:
-                    st.sidebar.error(f"❌ Error: {str(e)}")
-
+        if st.button("🗑️ Eliminar última") and len(st.session_state.plots) > 0:
+            st.session_state.plots.pop()
     with col2:
-        if st.button("🗑️ Limpiar", use_container_width=True):
-            st.session_state.boussinesq_data = None
+        if st.button("🧹 Limpiar todas") and len(st.session_state.plots) > 0:
             st.session_state.plots = []
-            st.rerun()
+
+    st.markdown("---")
+
+    # Display all plots
+    if st.session_state.plots:
+        st.subheader(f"Gráficas ({len(st.session_state.plots)})")
+        # Static charts are plain images in the browser: much lighter with many plots
+        interactive = st.checkbox("Gráficas interactivas (zoom, valores al pasar el cursor)", value=False)
+        chart_config = {} if interactive else {"staticPlot": True, "displayModeBar": False}
+        log_scale = st.checkbox("Escala logarítmica (log₁₀ σz)", value=False)
+
+        # Grid indices of every saved plot in one vectorized pass: values that snap
+        # to the same lines share the memoized figures
+        requests = PlotBatch.from_configs(st.session_state.plots).requests(X, Y)
+        figs = _plot_figures(data, requests, log_scale)
+
+        for i, (plot_cfg, fig) in enumerate(zip(st.session_state.plots, figs)):
+            st.markdown(f"**Gráfica {i+1}: {plot_cfg['type']}**")
+
+            st.plotly_chart(fig, use_container_width=True, config=chart_config)
+            st.markdown("---")
+
+        # PDF export
+        if st.button("📄 Generar PDF"):
+            try:
+                # The figures are already built (and cached); only rasterize the new ones
+                images = _plot_images(figs)
+                if images is None:
+                    st.info("Instale kaleido para incluir las gráficas como imágenes en el PDF")
+                pdf_bytes = generate_pdf_report(data['params'], st.session_state.plots, X, Y, Z, sigma,
+                                                images=images)
+                st.download_button(
+                    label="⬇️ Descargar PDF",
+                    data=pdf_bytes,
+                    file_name="reporte_boussinesq.pdf",
+                    mime="application/pdf"
+                )
+            except Exception as e:
+                st.error(f"Error al generar PDF: {str(e)}")
+    else:
+        st.info("👆 Agregue gráficas usando los controles de arriba")
+
+
+def boussinesq_interface():
+    """Render Boussinesq calculation interface in sidebar and main content"""
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("⚙️ Parámetros de Cálculo")
+
+    # Initialize session state
+    st.session_state.setdefault('boussinesq_data', None)
+    st.session_state.setdefault('plots', [])
+
+    # Input parameters
+    # Inputs are batched in a form: editing them does not rerun the page until
+    # 'Calcular' is pressed
+    with st.sidebar.form("boussinesq_params", border=False):
+        with st.expander("Parámetros de Carga", expanded=True):
+            q = st.number_input("Sobrecarga q (kPa)", min_value=0.0, value=100.0, step=10.0)
+            col1, col2 = st.columns(2)
+            with col1:
+                Lx = st.number_input("Lx (m)", min_value=0.1, value=10.0, step=1.0)
+            with col2:
+                Ly = st.number_input("Ly (m)", min_value=0.1, value=10.0, step=1.0)
+
+        with st.expander("Dominio de Cálculo", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                Xmin = st.number_input("Xmin (m)", value=-20.0, step=1.0)
+                Ymin = st.number_input("Ymin (m)", value=-20.0, step=1.0)
+            with col2:
+                Xmax = st.number_input("Xmax (m)", value=20.0, step=1.0)
+                Ymax = st.number_input("Ymax (m)", value=20.0, step=1.0)
+            Zmax = st.number_input("Profundidad máx Z (m)", min_value=0.1, value=30.0, step=5.0)
+
+        with st.expander("Resolución de Malla", expanded=True):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                Nx = st.number_input("Nx", min_value=2, max_value=200, value=41, step=5)
+            with col2:
+                Ny = st.number_input("Ny", min_value=2, max_value=200, value=41, step=5)
+            with col3:
+                Nz = st.number_input("Nz", min_value=2, max_value=200, value=31, step=5)
+            use_gpu = st.toggle("Usar GPU", value=True,
+                                help="Con CuPy y una GPU CUDA, las mallas de más de 1e6 puntos se calculan en la GPU")
+
+        st.markdown("---")
+        calcular = st.form_submit_button("🔄 Calcular", use_container_width=True)
+
+    if calcular:
+        with st.spinner("Calculando esfuerzos..."):
+            try:
+                X, Y, Z, sigma = compute_boussinesq_cached(
+                    q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, use_gpu=use_gpu
+                )
+                # float32 is plenty for kPa to 2 decimals and halves every copy,
+                # slice and chart payload; the 1-D axes stay float64
+                sigma = np.ascontiguousarray(sigma, dtype=np.float32)
+                st.session_state.boussinesq_data = {
+                    'X': X, 'Y': Y, 'Z': Z, 'sigma': sigma, 'data_id': uuid.uuid4().hex,
+                    'stats': _grid_stats(X, Y, sigma),
+                    'params': {'q': q, 'Lx': Lx, 'Ly': Ly, 'Xmin': Xmin, 'Xmax': Xmax,
+                               'Ymin': Ymin, 'Ymax': Ymax, 'Zmax': Zmax, 'Nx': Nx, 'Ny': Ny, 'Nz': Nz}
+                }
+                st.sidebar.success("✅ Cálculo completado")
+            except Exception as e:
+                st.sidebar.error(f"❌ Error: {str(e)}")
+
+    if st.sidebar.button("🗑️ Limpiar", use_container_width=True):
+        st.session_state.boussinesq_data = None
+        st.session_state.plots = []
+        st.session_state.pop('plot_figs', None)
 
     # Cache management
     with st.sidebar.expander("💾 Gestión de Cache", expanded=False):
         cache_name = st.text_input("Nombre de cache",
                                    value=f"boussinesq_{get_cache_hash(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz)}")
+        compression = st.radio("Formato al guardar", ['none', 'zstd'],
+                               format_func={'none': "Sin compresión (carga mapeada en memoria)",
+                                            'zstd': "Zstandard (archivo más pequeño)"}.get)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -98,8 +268,9 @@ def boussinesq_interface():
                             'X': st.session_state.boussinesq_data['X'],
                             'Y': st.session_state.boussinesq_data['Y'],
                             'Z': st.session_state.boussinesq_data['Z'],
-                            'sigma': st.session_state.boussinesq_data['sigma']
-                        })
+                            # Stresses are stored in single precision: half the bytes to write and read
+                            'sigma': st.session_state.boussinesq_data['sigma'].astype(np.float32, copy=False)
+                        }, compression=compression)
                         st.success(f"💾 Guardado: {cache_path}")
                     except Exception as e:
                         st.error(f"Error al guardar: {str(e)}")
@@ -110,14 +281,19 @@ def boussinesq_interface():
             if st.button("Cargar", use_container_width=True):
                 cache_path = f"Tools/cache/{cache_name}.npz"
                 try:
-                    data = load_cache(cache_path)
+                    # Uncompressed caches are memory-mapped: plots read only their slices
+                    data = load_cache(cache_path, mmap_mode='r')
+                    # Caches saved before sigma became float32 are downcast on load
+                    sigma = data['sigma'] if data['sigma'].dtype == np.float32 \
+                        else data['sigma'].astype(np.float32)
                     st.session_state.boussinesq_data = {
-                        'X': data['X'], 'Y': data['Y'], 'Z': data['Z'], 'sigma': data['sigma'],
+                        'X': data['X'], 'Y': data['Y'], 'Z': data['Z'], 'sigma': sigma,
+                        'data_id': uuid.uuid4().hex,
+                        'stats': _grid_stats(data['X'], data['Y'], sigma),
                         'params': {'q': q, 'Lx': Lx, 'Ly': Ly, 'Xmin': Xmin, 'Xmax': Xmax,
                                    'Ymin': Ymin, 'Ymax': Ymax, 'Zmax': Zmax, 'Nx': Nx, 'Ny': Ny, 'Nz': Nz}
                     }
                     st.success(f"📂 Cargado: {cache_path}")
-                    st.rerun()
                 except FileNotFoundError:
                     st.error(f"Archivo no encontrado: {cache_path}")
                 except Exception as e:
@@ -130,12 +306,14 @@ def boussinesq_interface():
 
         st.header("📊 Resultados de Boussinesq")
 
-        # Summary statistics
+        # Summary statistics, reduced once per data set rather than on every rerun
+        if 'stats' not in data:
+            data['stats'] = _grid_stats(X, Y, sigma)
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("σz máximo", f"{sigma.max():.2f} kPa")
+            st.metric("σz máximo", f"{data['stats']['sigma_max']:.2f} kPa")
         with col2:
-            st.metric("σz mínimo", f"{sigma.min():.2f} kPa")
+            st.metric("σz mínimo", f"{data['stats']['sigma_min']:.2f} kPa")
         with col3:
             st.metric("Puntos totales", f"{Nx*Ny*Nz:,}")
         with col4:
@@ -143,99 +321,52 @@ def boussinesq_interface():
 
         st.markdown("---")
 
-        # Plot controls
-        st.subheader("📈 Visualización")
-
-        # Add plot controls
-        plot_type = st.selectbox("Tipo de gráfica",
-                                 ["Corte X-Z", "Corte Y-Z", "Perfil en profundidad"])
-
-        col1, col2, col3 = st.columns(3)
-
-        if plot_type == "Corte X-Z":
-            with col1:
-                y_val = st.number_input("Valor de Y (m)",
-                                        min_value=float(Y.min()),
-                                        max_value=float(Y.max()),
-                                        value=0.0)
-            with col2:
-                if st.button("➕ Agregar gráfica"):
-                    st.session_state.plots.append({'type': plot_type, 'y_val': y_val})
-                    st.rerun()
-
-        elif plot_type == "Corte Y-Z":
-            with col1:
-                x_val = st.number_input("Valor de X (m)",
-                                        min_value=float(X.min()),
-                                        max_value=float(X.max()),
-                                        value=0.0)
-            with col2:
-                if st.button("➕ Agregar gráfica"):
-                    st.session_state.plots.append({'type': plot_type, 'x_val': x_val})
-                    st.rerun()
-
-        elif plot_type == "Perfil en profundidad":
-            with col1:
-                x_point = st.number_input("X (m)",
-                                          min_value=float(X.min()),
-                                          max_value=float(X.max()),
-                                          value=0.0)
-            with col2:
-                y_point = st.number_input("Y (m)",
-                                          min_value=float(Y.min()),
-                                          max_value=float(Y.max()),
-                                          value=0.0)
-            with col3:
-                if st.button("➕ Agregar gráfica"):
-                    st.session_state.plots.append({'type': plot_type, 'x_point': x_point, 'y_point': y_point})
-                    st.rerun()
-
-        # Plot management buttons
-        col1, col2, col3 = st.columns([1, 1, 2])
-        with col1:
-            if st.button("🗑️ Eliminar última") and len(st.session_state.plots) > 0:
-                st.session_state.plots.pop()
-                st.rerun()
-        with col2:
-            if st.button("🧹 Limpiar todas") and len(st.session_state.plots) > 0:
-                st.session_state.plots = []
-                st.rerun()
-
-        st.markdown("---")
-
-        # Display all plots
-        if st.session_state.plots:
-            st.subheader(f"Gráficas ({len(st.session_state.plots)})")
+        # Plot controls, plots and PDF rerun as a fragment: interacting with them
+        # does not re-execute the sidebar and the metrics above
+        _plots_section(data)
+    else:
+        st.info("👈 Configure los parámetros y presione 'Calcular' para comenzar")
 
-            for i, plot_cfg in enumerate(st.session_state.plots):
-                st.markdown(f"**Gráfica {i+1}: {plot_cfg['type']}**")
 
-                if plot_cfg['type'] == "Corte X-Z":
-                    fig = create_xz_plot(X, Y, Z, sigma, plot_cfg['y_val'])
-                elif plot_cfg['type'] == "Corte Y-Z":
-                    fig = create_yz_plot(X, Y, Z, sigma, plot_cfg['x_val'])
-                elif plot_cfg['type'] == "Perfil en profundidad":
-                    fig = create_depth_profile_plot(X, Y, Z, sigma, plot_cfg['x_point'], plot_cfg['y_point'])
+def _circular_view(data):
+    """Figure, formatted table and CSV of a circular result, built once per calculation"""
+    # circular_data is replaced on every 'Calcular', so the view lives in it and
+    # reruns from unrelated widgets only read it back
+    if 'view' in data:
+        return data['view']
+
+    z, sigma_z, params = data['z'], data['sigma_z'], data['params']
+    r = float(np.sqrt(params['x_point']**2 + params['y_point']**2))
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=sigma_z,
+        y=z,
+        mode='lines+markers',
+        name='σz vs z',
+        line=dict(color='blue', width=2),
+        marker=dict(size=4)
+    ))
+
+    fig.update_layout(
+        title=f'Esfuerzo Vertical a r={r:.2f}m del centro',
+        xaxis_title='σz (kPa)',
+        yaxis_title='Profundidad z (m)',
+        yaxis=dict(autorange='reversed'),  # Depth increases downward
+        height=500,
+        showlegend=True
+    )
 
-                st.plotly_chart(fig, use_container_width=True)
-                st.markdown("---")
+    # Numbers are formatted column-wise before building the DataFrame, rather
+    # than through one Python format call per cell
+    df = pd.DataFrame({
+        'Profundidad z (m)': np.char.mod('%.2f', z),
+        'σz (kPa)': np.char.mod('%.2f', sigma_z)
+    })
 
-            # PDF export
-            if st.button("📄 Generar PDF"):
-                try:
-                    pdf_bytes = generate_pdf_report(data['params'], st.session_state.plots, X, Y, Z, sigma)
-                    st.download_button(
-                        label="⬇️ Descargar PDF",
-                        data=pdf_bytes,
-                        file_name="reporte_boussinesq.pdf",
-                        mime="application/pdf"
-                    )
-                except Exception as e:
-                    st.error(f"Error al generar PDF: {str(e)}")
-        else:
-            st.info("👆 Agregue gráficas usando los controles de arriba")
-    else:
-        st.info("👈 Configure los parámetros y presione 'Calcular' para comenzar")
+    data['view'] = {'r': r, 'sigma_max': float(sigma_z.max()), 'sigma_min': float(sigma_z.min()),
+                    'fig': fig, 'df': df, 'csv': df.to_csv(index=False)}
+    return data['view']
 
 
 def esfuerzo_vertical_continua():
@@ -249,131 +380,95 @@ def esfuerzo_vertical_circular():
     st.sidebar.subheader("⚙️ Parámetros de Cálculo")
 
     # Initialize session state
-    if 'circular_data' not in st.session_state:
-        st.session_state.circular_data = None
+    st.session_state.setdefault('circular_data', None)
 
     # Input parameters
-    with st.sidebar.expander("Parámetros de Carga Circular", expanded=True):
-        q = st.number_input("Sobrecarga q (kPa)", min_value=0.0, value=100.0, step=10.0)
-        radius = st.number_input("Radio (m)", min_value=0.1, value=5.0, step=0.5)
-
-    with st.sidebar.expander("Punto de Cálculo", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            x_point = st.number_input("X (m)", value=0.0, step=1.0)
-        with col2:
-            y_point = st.number_input("Y (m)", value=0.0, step=1.0)
-
-    with st.sidebar.expander("Rango de Profundidad", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            z_min = st.number_input("Z mínima (m)", min_value=0.1, value=0.1, step=0.1)
-            n_points = st.number_input("Número de puntos", min_value=10, max_value=200, value=50, step=10)
-        with col2:
-            z_max = st.number_input("Z máxima (m)", min_value=0.1, value=30.0, step=5.0)
+    # Inputs are batched in a form: editing them does not rerun the page until
+    # 'Calcular' is pressed
+    with st.sidebar.form("circular_params", border=False):
+        with st.expander("Parámetros de Carga Circular", expanded=True):
+            q = st.number_input("Sobrecarga q (kPa)", min_value=0.0, value=100.0, step=10.0)
+            radius = st.number_input("Radio (m)", min_value=0.1, value=5.0, step=0.5)
+
+        with st.expander("Punto de Cálculo", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                x_point = st.number_input("X (m)", value=0.0, step=1.0)
+            with col2:
+                y_point = st.number_input("Y (m)", value=0.0, step=1.0)
 
-    # Calculation buttons
-    st.sidebar.markdown("---")
-    col1, col2 = st.sidebar.columns(2)
+        with st.expander("Rango de Profundidad", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                z_min = st.number_input("Z mínima (m)", min_value=0.1, value=0.1, step=0.1)
+                n_points = st.number_input("Número de puntos", min_value=10, max_value=200, value=50, step=10)
+            with col2:
+                z_max = st.number_input("Z máxima (m)", min_value=0.1, value=30.0, step=5.0)
 
-    with col1:
-        if st.button("🔄 Calcular", use_container_width=True):
-            with st.spinner("Calculando esfuerzos circulares..."):
-                try:
-                    z_values = np.linspace(z_min, z_max, n_points)
-                    z_result, sigma_z = calc_circular_surcharge(q, radius, x_point, y_point, z_values)
-                    
-                    st.session_state.circular_data = {
-                        'z': z_result,
-                        'sigma_z': sigma_z,
-                        'params': {
-                            'q': q,
-                            'radius': radius,
-                            'x_point': x_point,
-                            'y_point': y_point,
-                            'z_min': z_min,
-                            'z_max': z_max,
-                            'n_points': n_points
-                        }
+        st.markdown("---")
+        calcular = st.form_submit_button("🔄 Calcular", use_container_width=True)
+
+    if calcular:
+        with st.spinner("Calculando esfuerzos circulares..."):
+            try:
+                z_values = np.linspace(z_min, z_max, n_points)
+                z_result, sigma_z = calc_circular_surcharge(q, radius, x_point, y_point, z_values)
+                
+                st.session_state.circular_data = {
+                    'z': z_result,
+                    'sigma_z': sigma_z,
+                    'params': {
+                        'q': q,
+                        'radius': radius,
+                        'x_point': x_point,
+                        'y_point': y_point,
+                        'z_min': z_min,
+                        'z_max': z_max,
+                        'n_points': n_points
                     }
-                    st.sidebar.success("✅ Cálculo completado")
-                except Exception as e:
-                    st.sidebar.error(f"❌ Error: {str(e)}")
+                }
+                st.sidebar.success("✅ Cálculo completado")
+            except Exception as e:
+                st.sidebar.error(f"❌ Error: {str(e)}")
 
-    with col2:
-        if st.button("🗑️ Limpiar", use_container_width=True):
-            st.session_state.circular_data = None
-            st.rerun()
+    if st.sidebar.button("🗑️ Limpiar", use_container_width=True):
+        st.session_state.circular_data = None
 
     # Main content area
     if st.session_state.circular_data is not None:
         data = st.session_state.circular_data
-        z = data['z']
-        sigma_z = data['sigma_z']
-        params = data['params']
+        # Figure and table are built on the first render of each result only
+        view = _circular_view(data)
 
         st.header("📊 Resultados de Esfuerzo Vertical Circular")
 
         # Summary statistics
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("σz máximo", f"{sigma_z.max():.2f} kPa")
+            st.metric("σz máximo", f"{view['sigma_max']:.2f} kPa")
         with col2:
-            st.metric("σz mínimo", f"{sigma_z.min():.2f} kPa")
+            st.metric("σz mínimo", f"{view['sigma_min']:.2f} kPa")
         with col3:
-            r = np.sqrt(params['x_point']**2 + params['y_point']**2)
-            st.metric("Distancia radial", f"{r:.2f} m")
+            st.metric("Distancia radial", f"{view['r']:.2f} m")
         with col4:
-            st.metric("Puntos calculados", f"{len(z):,}")
+            st.metric("Puntos calculados", f"{len(data['z']):,}")
 
         st.markdown("---")
 
         # Plot: sigma_z vs z
         st.subheader("📈 Gráfica: Esfuerzo Vertical vs Profundidad")
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=sigma_z,
-            y=z,
-            mode='lines+markers',
-            name='σz vs z',
-            line=dict(color='blue', width=2),
-            marker=dict(size=4)
-        ))
-        
-        fig.update_layout(
-            title=f'Esfuerzo Vertical a r={r:.2f}m del centro',
-            xaxis_title='σz (kPa)',
-            yaxis_title='Profundidad z (m)',
-            yaxis=dict(autorange='reversed'),  # Depth increases downward
-            height=500,
-            showlegend=True
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(view['fig'], use_container_width=True)
 
         st.markdown("---")
 
         # Results table
         st.subheader("📋 Tabla de Resultados")
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Profundidad z (m)': z,
-            'σz (kPa)': sigma_z
-        })
-        
-        # Format numbers
-        df['Profundidad z (m)'] = df['Profundidad z (m)'].map('{:.2f}'.format)
-        df['σz (kPa)'] = df['σz (kPa)'].map('{:.2f}'.format)
-        
-        st.dataframe(df, use_container_width=True, height=400)
+        st.dataframe(view['df'], use_container_width=True, height=400)
 
         # Download button for CSV
-        csv = df.to_csv(index=False)
         st.download_button(
             label="📥 Descargar CSV",
-            data=csv,
+            data=view['csv'],
             file_name="esfuerzo_circular.csv",
             mime="text/csv"
         )
@@ -6,58 +6,228 @@ Streamlit interface to improve code organization and testability.
 """
 
 import hashlib
+import importlib.util
+import io
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 import streamlit as st
-from scipy.interpolate import interpn
 from fpdf import FPDF
 from Tools import compute_rectangular_boussinesq
+from Tools import Tools as _tools
 
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
 
-def get_cache_hash(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz):
-    """Generate a hash for cache file naming based on parameters"""
-    params_str = f"{q}_{Lx}_{Ly}_{Xmin}_{Xmax}_{Ymin}_{Ymax}_{Zmax}_{Nx}_{Ny}_{Nz}"
-    return hashlib.md5(params_str.encode()).hexdigest()[:8]
+# Batches of query points from which TrilinearInterpolator uses the Numba kernel;
+# below it the NumPy path is cheaper than the dispatch
+_NUMBA_MIN_POINTS = 64
 
+# Grid lines per axis sent to a contour plot: a 500 px tall figure cannot show
+# more, and larger slices only grow the chart payload and the contour tracing
+_CONTOUR_MAX_POINTS = 128
 
-@st.cache_data
-def compute_boussinesq_cached(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz):
-    """Cached wrapper for compute_rectangular_boussinesq"""
-    return compute_rectangular_boussinesq(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz)
+# Floor applied before the log10 of the stresses: zero stress at the edges
+# of the domain would otherwise give -inf
+_LOG_FLOOR = 1e-12
 
 
-def interpolate_value(X, Y, Z, sigma, x_point, y_point, z_point):
-    """Interpolate sigma value at a specific point using trilinear interpolation"""
-    # Create points array for interpolation
-    points = (Z, Y, X)
+def get_cache_hash(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz):
+    """Generate a hash for cache file naming based on parameters"""
+    # Digest of the packed, normalized parameters: stable across sessions and
+    # platforms, equal numbers of different types give the same name, and unlike
+    # the built-in hash (hash(-1.0) == hash(-2.0)) it does not collide on small
+    # domain changes. + 0.0 maps -0.0 to 0.0
+    buf = struct.pack('<8d3q', *(float(v) + 0.0 for v in (q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax)),
+                      int(Nx), int(Ny), int(Nz))
+    return hashlib.blake2b(buf, digest_size=4).hexdigest()
+
+
+def compute_boussinesq_cached(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, use_gpu=True):
+    """Cached wrapper for compute_rectangular_boussinesq (GPU for large grids if use_gpu)"""
+    # Plain Python scalars are cheap to hash and make 100, 100.0 and np.float64(100)
+    # share one cache entry
+    return _compute_boussinesq(float(q), float(Lx), float(Ly), float(Xmin), float(Xmax),
+                               float(Ymin), float(Ymax), float(Zmax), int(Nx), int(Ny), int(Nz),
+                               'auto' if use_gpu else 'cpu')
+
+
+# Bounded LRU of recent grids shared by reference: a hit returns the same arrays,
+# without the unpickling copy of st.cache_data. They are made read-only so no
+# caller can corrupt the shared entry. app.py shows its own spinner around the call
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _compute_boussinesq(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, backend):
+    """Memoized compute_rectangular_boussinesq on normalized scalar arguments"""
+    result = _compute_boussinesq_persisted(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, backend,
+                                           _tools._MEMO_VERSION)
+    for arr in result:
+        arr.flags.writeable = False
+    return result
+
+
+# Second level persisted to disk, so identical parameters survive app restarts.
+# st.cache_data keys on this function's source and arguments only, so the Tools
+# kernel version is passed in: a kernel change then misses the stale entries
+@st.cache_data(max_entries=8, persist="disk", show_spinner=False)
+def _compute_boussinesq_persisted(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz, backend, kernel_version):
+    """compute_rectangular_boussinesq, memoized on disk per kernel_version"""
+    return compute_rectangular_boussinesq(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz,
+                                          backend=backend)
+
+
+def _grid_cell(axis, v):
+    """Lower cell index, fractional offset in that cell and in-range mask along an ascending axis"""
+    i = np.clip(np.searchsorted(axis, v, side='right') - 1, 0, len(axis) - 2)
+    f = (v - axis[i]) / (axis[i + 1] - axis[i])
+    return i, f, (v >= axis[0]) & (v <= axis[-1])
+
+
+class TrilinearInterpolator:
+    """Trilinear interpolation of sigma (Nz, Ny, Nx) on the X, Y, Z grid, 0 outside it
+
+    Built once per grid and called many times: the axes are converted once and
+    each call is a direct 8-corner lookup, without a generic n-D interpolator.
+    """
+
+    def __init__(self, X, Y, Z, sigma):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.Y = np.asarray(Y, dtype=np.float64)
+        self.Z = np.asarray(Z, dtype=np.float64)
+        self.sigma = sigma
+
+    def __call__(self, x, y, z):
+        """sigma at the points (x, y, z), scalars or broadcastable arrays"""
+        x, y, z = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (x, y, z)))
+        if _NUMBA_AVAILABLE and x.size >= _NUMBA_MIN_POINTS:
+            out = np.empty(x.shape)
+            _trilinear_kernel(self.X, self.Y, self.Z, np.asarray(self.sigma),
+                              x.ravel(), y.ravel(), z.ravel(), out.reshape(-1))
+            return out
+
+        ix, fx, in_x = _grid_cell(self.X, x)
+        iy, fy, in_y = _grid_cell(self.Y, y)
+        iz, fz, in_z = _grid_cell(self.Z, z)
+        sigma = self.sigma
+
+        # Weighted sum of the 8 cell corners: along x, then y, then z
+        def _row(jz, jy):
+            return sigma[jz, jy, ix] * (1 - fx) + sigma[jz, jy, ix + 1] * fx
+
+        def _plane(jz):
+            return _row(jz, iy) * (1 - fy) + _row(jz, iy + 1) * fy
+
+        value = _plane(iz) * (1 - fz) + _plane(iz + 1) * fz
+        return np.where(in_x & in_y & in_z, value, 0.0)
+
+
+if _NUMBA_AVAILABLE:
+    @njit(inline='always')
+    def _cell_nb(axis, v):
+        """Lower cell index and fractional offset of v on an ascending axis"""
+        i = min(max(np.searchsorted(axis, v, side='right') - 1, 0), len(axis) - 2)
+        return i, (v - axis[i]) / (axis[i + 1] - axis[i])
+
+    @njit(parallel=True, cache=True)
+    def _trilinear_kernel(X, Y, Z, sigma, x, y, z, out):
+        """Same 8-corner sum as TrilinearInterpolator, one point per iteration in parallel"""
+        for p in prange(len(x)):
+            if not (X[0] <= x[p] <= X[-1] and Y[0] <= y[p] <= Y[-1] and Z[0] <= z[p] <= Z[-1]):
+                out[p] = 0.0
+                continue
+            ix, fx = _cell_nb(X, x[p])
+            iy, fy = _cell_nb(Y, y[p])
+            iz, fz = _cell_nb(Z, z[p])
+            value = 0.0
+            for dz in range(2):
+                wz = fz if dz else 1.0 - fz
+                for dy in range(2):
+                    wy = fy if dy else 1.0 - fy
+                    row = sigma[iz + dz, iy + dy, ix] * (1.0 - fx) + sigma[iz + dz, iy + dy, ix + 1] * fx
+                    value += wz * wy * row
+            out[p] = value
 
-    # Query point
-    xi = np.array([[z_point, y_point, x_point]])
 
-    # Interpolate
-    result = interpn(points, sigma, xi, method='linear', bounds_error=False, fill_value=0)
-    return result[0]
+def interpolate_value(X, Y, Z, sigma, x_point, y_point, z_point):
+    """Interpolate sigma value at a specific point using trilinear interpolation"""
+    # For many queries on one grid, build a TrilinearInterpolator once and call it
+    return TrilinearInterpolator(X, Y, Z, sigma)(x_point, y_point, z_point)[()]
+
+
+def nearest_index(axis, value):
+    """Index of the grid line of an ascending 1-D axis nearest to value (the lower one on ties)"""
+    n = len(axis)
+    if n == 1:
+        return 0
+    value = float(value)
+    a0, a1 = axis[:2].tolist()
+    if a1 > a0:
+        # Uniform grids (all those of compute_rectangular_boussinesq): O(1) guess
+        i = min(max(int(round((value - a0) / (a1 - a0))), 0), n - 1)
+        # |axis - value| is unimodal on a sorted axis, so beating both neighbours
+        # means i is the nearest line
+        lo = max(i - 1, 0)
+        near = [abs(a - value) for a in axis[lo:i + 2].tolist()]
+        d = near[i - lo]
+        if not ((i > 0 and near[0] <= d) or (i < n - 1 and near[-1] < d)):
+            return i
+    # Non-uniform axis: binary search, then the closer of the two bracketing lines
+    j = min(max(int(np.searchsorted(axis, value)), 1), n - 1)
+    return j - 1 if abs(axis[j - 1] - value) <= abs(axis[j] - value) else j
 
 
 def create_xz_plot(X, Y, Z, sigma, y_val):
     """Create X-Z contour plot at a specific Y value"""
-    # Find nearest Y index
-    y_idx = np.argmin(np.abs(Y - y_val))
-    actual_y = Y[y_idx]
+    return create_xz_plot_idx(X, Y, Z, sigma, nearest_index(Y, y_val))
+
 
+def create_xz_plot_idx(X, Y, Z, sigma, y_idx):
+    """Create X-Z contour plot on the grid line Y[y_idx]"""
     # Extract X-Z slice
-    sigma_xz = sigma[:, y_idx, :]  # shape (Nz, Nx)
+    return _xz_figure(X, Z, sigma[:, y_idx, :], Y[y_idx])  # slice shape (Nz, Nx)
+
+
+def log_stress(sigma):
+    """log10 of the stresses as float32, for log-scale plots; compute once per data set"""
+    # In float64, then cast: 1e-12 rounded to float32 would put the floor at -12.000001
+    return np.log10(np.maximum(sigma, _LOG_FLOOR, dtype=np.float64)).astype(np.float32)
+
 
-    # Create meshgrid for plotting
-    X_grid, Z_grid = np.meshgrid(X, Z)
+def _stress_label(log_scale):
+    """Axis / colorbar title for stress values"""
+    return 'log₁₀ σz (kPa)' if log_scale else 'σz (kPa)'
+
+
+def _downsample_slice(H, Z, sigma_hz, max_points=_CONTOUR_MAX_POINTS):
+    """Keep at most max_points evenly spread grid lines per axis of an (Nz, Nh) slice, ends included"""
+    def _lines(n):
+        if n <= max_points:
+            return slice(None)
+        return np.unique(np.linspace(0, n - 1, max_points).round().astype(int))
+
+    iz, ih = _lines(len(Z)), _lines(len(H))
+    return H[ih], Z[iz], sigma_hz[iz][:, ih]
+
+
+def _xz_figure(X, Z, sigma_xz, actual_y, log_scale=False):
+    """X-Z contour figure of an already extracted (Nz, Nx) slice"""
+    X, Z, sigma_xz = _downsample_slice(X, Z, sigma_xz)
 
     # Create plotly contour plot
     fig = go.Figure(data=go.Contour(
         x=X,
         y=Z,
-        z=sigma_xz,
+        z=np.asarray(sigma_xz, dtype=np.float32),  # serialized as base64 float32 bytes, not JSON floats
         colorscale='Viridis',
-        colorbar=dict(title='σz (kPa)'),
+        colorbar=dict(title=_stress_label(log_scale)),
         contours=dict(
             showlabels=True,
             labelfont=dict(size=10)
@@ -77,20 +247,26 @@ def create_xz_plot(X, Y, Z, sigma, y_val):
 
 def create_yz_plot(X, Y, Z, sigma, x_val):
     """Create Y-Z contour plot at a specific X value"""
-    # Find nearest X index
-    x_idx = np.argmin(np.abs(X - x_val))
-    actual_x = X[x_idx]
+    return create_yz_plot_idx(X, Y, Z, sigma, nearest_index(X, x_val))
+
 
+def create_yz_plot_idx(X, Y, Z, sigma, x_idx):
+    """Create Y-Z contour plot on the grid line X[x_idx]"""
     # Extract Y-Z slice
-    sigma_yz = sigma[:, :, x_idx]  # shape (Nz, Ny)
+    return _yz_figure(Y, Z, sigma[:, :, x_idx], X[x_idx])  # slice shape (Nz, Ny)
+
+
+def _yz_figure(Y, Z, sigma_yz, actual_x, log_scale=False):
+    """Y-Z contour figure of an already extracted (Nz, Ny) slice"""
+    Y, Z, sigma_yz = _downsample_slice(Y, Z, sigma_yz)
 
     # Create plotly contour plot
     fig = go.Figure(data=go.Contour(
         x=Y,
         y=Z,
-        z=sigma_yz,
+        z=np.asarray(sigma_yz, dtype=np.float32),  # serialized as base64 float32 bytes, not JSON floats
         colorscale='Viridis',
-        colorbar=dict(title='σz (kPa)'),
+        colorbar=dict(title=_stress_label(log_scale)),
         contours=dict(
             showlabels=True,
             labelfont=dict(size=10)
@@ -110,19 +286,21 @@ def create_yz_plot(X, Y, Z, sigma, x_val):
 
 def create_depth_profile_plot(X, Y, Z, sigma, x_point, y_point):
     """Create depth profile plot at a specific (x, y) location"""
-    # Find nearest X and Y indices
-    x_idx = np.argmin(np.abs(X - x_point))
-    y_idx = np.argmin(np.abs(Y - y_point))
-    actual_x = X[x_idx]
-    actual_y = Y[y_idx]
+    return create_depth_profile_plot_idx(X, Y, Z, sigma, nearest_index(X, x_point), nearest_index(Y, y_point))
+
 
+def create_depth_profile_plot_idx(X, Y, Z, sigma, x_idx, y_idx):
+    """Create depth profile plot on the vertical through (X[x_idx], Y[y_idx])"""
     # Extract depth profile
-    sigma_profile = sigma[:, y_idx, x_idx]
+    return _profile_figure(Z, sigma[:, y_idx, x_idx], X[x_idx], Y[y_idx])
 
+
+def _profile_figure(Z, sigma_profile, actual_x, actual_y, log_scale=False):
+    """Depth profile figure of an already extracted (Nz,) profile"""
     # Create plotly line plot
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=sigma_profile,
+        x=np.asarray(sigma_profile, dtype=np.float32),
         y=Z,
         mode='lines+markers',
         name='σz vs Profundidad',
@@ -132,7 +310,7 @@ def create_depth_profile_plot(X, Y, Z, sigma, x_point, y_point):
 
     fig.update_layout(
         title=f'Perfil de Esfuerzo en X={actual_x:.2f} m, Y={actual_y:.2f} m',
-        xaxis_title='σz (kPa)',
+        xaxis_title=_stress_label(log_scale),
         yaxis_title='Profundidad Z (m)',
         yaxis=dict(autorange='reversed'),  # Depth increases downward
         height=500,
@@ -142,8 +320,111 @@ def create_depth_profile_plot(X, Y, Z, sigma, x_point, y_point):
     return fig
 
 
-def generate_pdf_report(params, plots_config, X, Y, Z, sigma):
-    """Generate PDF report with parameters and plots"""
+def create_plots(X, Y, Z, sigma, requests, log_scale=False):
+    """Build several plots, gathering the slices of each plot type from sigma in one pass
+
+    requests is a sequence of (plot_type, x_idx, y_idx) tuples, with plot_type one of
+    "Corte X-Z" (uses y_idx), "Corte Y-Z" (uses x_idx) or "Perfil en profundidad".
+    With log_scale, sigma is expected to hold log_stress values and the figures are
+    labelled accordingly. Returns the figures in the same order.
+    """
+    figs = [None] * len(requests)
+    by_type = {}
+    for k, (plot_type, x_idx, y_idx) in enumerate(requests):
+        by_type.setdefault(plot_type, []).append((k, x_idx, y_idx))
+
+    # One fancy-indexing gather per type instead of one strided pass per plot
+    if "Corte X-Z" in by_type:
+        ks, _, iy = zip(*by_type["Corte X-Z"])
+        slices = sigma[:, list(iy), :]  # shape (Nz, n, Nx)
+        for j, k in enumerate(ks):
+            figs[k] = _xz_figure(X, Z, slices[:, j, :], Y[iy[j]], log_scale)
+    if "Corte Y-Z" in by_type:
+        ks, ix, _ = zip(*by_type["Corte Y-Z"])
+        slices = np.moveaxis(sigma[:, :, list(ix)], 2, 0)  # shape (n, Nz, Ny)
+        for j, k in enumerate(ks):
+            figs[k] = _yz_figure(Y, Z, slices[j], X[ix[j]], log_scale)
+    if "Perfil en profundidad" in by_type:
+        ks, ix, iy = zip(*by_type["Perfil en profundidad"])
+        # Depth-major copy of just the gathered columns, shape (n, Nz): each profile
+        # is then one contiguous row, without transposing the whole grid
+        profiles = np.ascontiguousarray(sigma[:, list(iy), list(ix)].T)
+        for j, k in enumerate(ks):
+            figs[k] = _profile_figure(Z, profiles[j], X[ix[j]], Y[iy[j]], log_scale)
+
+    return figs
+
+
+# Plot types in the order of their PlotBatch codes
+PLOT_TYPES = ("Corte X-Z", "Corte Y-Z", "Perfil en profundidad")
+
+
+def _nearest_indices(axis, values):
+    """nearest_index for an array of values (NaN entries map to -1)"""
+    j = np.clip(np.searchsorted(axis, values), 1, len(axis) - 1)
+    idx = np.where(np.abs(axis[j - 1] - values) <= np.abs(axis[j] - values), j - 1, j)
+    return np.where(np.isnan(values), -1, idx)
+
+
+@dataclass
+class PlotBatch:
+    """Saved plot configurations as parallel arrays, one entry per plot
+
+    types holds codes into PLOT_TYPES; x_vals and y_vals are NaN where a plot
+    type does not use that coordinate.
+    """
+    types: np.ndarray
+    x_vals: np.ndarray
+    y_vals: np.ndarray
+
+    @classmethod
+    def from_configs(cls, plots_config):
+        """Build from the app's plot dicts ({'type', 'x_val' | 'y_val' | 'x_point', 'y_point'})"""
+        n = len(plots_config)
+        types = np.empty(n, dtype=np.int8)
+        x_vals = np.full(n, np.nan)
+        y_vals = np.full(n, np.nan)
+        for k, cfg in enumerate(plots_config):
+            types[k] = PLOT_TYPES.index(cfg['type'])
+            x_vals[k] = cfg.get('x_val', cfg.get('x_point', np.nan))
+            y_vals[k] = cfg.get('y_val', cfg.get('y_point', np.nan))
+        return cls(types, x_vals, y_vals)
+
+    def requests(self, X, Y):
+        """create_plots requests: (plot_type, x_idx, y_idx), grid indices resolved in one pass per axis"""
+        x_idx = _nearest_indices(np.asarray(X), self.x_vals).tolist()
+        y_idx = _nearest_indices(np.asarray(Y), self.y_vals).tolist()
+        return [(PLOT_TYPES[t], None if ix < 0 else ix, None if iy < 0 else iy)
+                for t, ix, iy in zip(self.types.tolist(), x_idx, y_idx)]
+
+
+def render_figures_png(figs, width=800, height=500, max_workers=4):
+    """Rasterize Plotly figures to PNG bytes in one Kaleido batch; None if Kaleido is not installed"""
+    if importlib.util.find_spec('kaleido') is None:
+        return None
+    if not figs:
+        return []
+    if hasattr(pio, 'write_images'):
+        # Plotly >= 6.1 (Kaleido >= 1): one browser session renders every figure
+        # instead of paying the startup per figure
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [os.path.join(tmp_dir, f"plot_{i}.png") for i in range(len(figs))]
+            pio.write_images(figs, paths, width=width, height=height)
+            return [Path(path).read_bytes() for path in paths]
+    # Older Plotly: one Kaleido call per figure, overlapped on a thread pool
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(figs)))) as executor:
+        return list(executor.map(
+            lambda fig: fig.to_image(format='png', width=width, height=height), figs))
+
+
+def generate_pdf_report(params, plots_config, X, Y, Z, sigma, images=None, stream=None):
+    """Generate PDF report with parameters and plots
+
+    images, if given, holds one PNG (bytes) per entry of plots_config, e.g. from
+    render_figures_png; each is embedded below its plot title. If stream (a binary
+    file object) is given the PDF is written to it and None is returned; otherwise
+    the PDF is returned as bytes.
+    """
     pdf = FPDF()
     pdf.add_page()
 
@@ -166,9 +447,8 @@ def generate_pdf_report(params, plots_config, X, Y, Z, sigma):
         f"Resolución malla: Nx={params['Nx']}, Ny={params['Ny']}, Nz={params['Nz']}"
     ]
 
-    for text in params_text:
-        pdf.cell(0, 6, text, ln=True)
-
+    # One layout pass for the whole block; ln() brings x back to the left margin
+    pdf.multi_cell(0, 6, "\n".join(params_text))
     pdf.ln(10)
 
     # Plots section
@@ -177,9 +457,19 @@ def generate_pdf_report(params, plots_config, X, Y, Z, sigma):
         pdf.cell(0, 10, 'Gráficas Generadas:', ln=True)
         pdf.set_font('Arial', '', 10)
 
-        for i, plot_cfg in enumerate(plots_config):
-            plot_type = plot_cfg['type']
-            pdf.cell(0, 6, f"{i+1}. {plot_type}", ln=True)
-
-    # Return PDF as bytes
+        titles = [f"{i+1}. {plot_cfg['type']}" for i, plot_cfg in enumerate(plots_config)]
+        if images:
+            # Each image sits below its own title
+            for title, image in zip(titles, images):
+                pdf.cell(0, 6, title, ln=True)
+                if image:
+                    pdf.image(io.BytesIO(image), w=pdf.epw)
+                    pdf.ln(4)
+        else:
+            pdf.multi_cell(0, 6, "\n".join(titles))
+
+    # Writing FPDF's buffer straight to the stream spares the copy into bytes
+    if stream is not None:
+        stream.write(pdf.output())
+        return None
     return bytes(pdf.output())
@@ -3,6 +3,7 @@ Test suite for the Geotechnical Tools Streamlit app
 """
 
 import pytest
+import numpy as np
 import pandas as pd
 from io import StringIO
 
@@ -12,7 +13,6 @@ def test_imports():
     try:
         import streamlit  # noqa: F401
         import pandas  # noqa: F401
-        import matplotlib  # noqa: F401
         import plotly  # noqa: F401
         assert True
     except ImportError as e:
@@ -36,9 +36,13 @@ def test_sample_csv_processing():
     assert list(df.columns) == ['depth', 'pressure', 'density']
 
     # Verify numeric columns
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+    numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
     assert len(numeric_cols) == 3
 
+    # Downcast columns are still numeric
+    df_small = df.astype({'depth': 'int32', 'density': 'float32'})
+    assert df_small.select_dtypes(include=np.number).columns.tolist() == numeric_cols
+
 
 def test_app_module_exists():
     """Test that app.py module can be imported"""
@@ -2,19 +2,46 @@
 Tests for calculation and visualization functions in calculations.py
 """
 import pytest
+import os
+import subprocess
+import sys
 import numpy as np
-import hashlib
+import plotly.graph_objects as go
 from calculations import (
     get_cache_hash,
     compute_boussinesq_cached,
     interpolate_value,
+    TrilinearInterpolator,
+    nearest_index,
     create_xz_plot,
+    create_xz_plot_idx,
     create_yz_plot,
+    create_yz_plot_idx,
     create_depth_profile_plot,
+    create_depth_profile_plot_idx,
+    create_plots,
+    log_stress,
+    PlotBatch,
     generate_pdf_report
 )
 
 
+@pytest.fixture(scope='module')
+def plot_grid():
+    """Small grid with a float32 stress field (the app's dtype), shared by the plot tests"""
+    rng = np.random.default_rng(0)
+    return (np.linspace(-10, 10, 11), np.linspace(-10, 10, 11), np.linspace(1, 20, 10),
+            rng.random((10, 11, 11), dtype=np.float32) * 100)
+
+
+@pytest.fixture(scope='module')
+def report_grid():
+    """Report-sized grid (31, 41, 41) with a float32 stress field, shared by the PDF tests"""
+    rng = np.random.default_rng(0)
+    return (np.linspace(-20, 20, 41), np.linspace(-20, 20, 41), np.linspace(1, 30, 31),
+            rng.random((31, 41, 41), dtype=np.float32) * 100)
+
+
 def test_get_cache_hash():
     """Test that cache hash is generated correctly and consistently"""
     # Test with specific parameters
@@ -33,18 +60,29 @@ def test_get_cache_hash():
 
 
 def test_get_cache_hash_format():
-    """Test that cache hash uses correct encoding"""
-    q, Lx, Ly = 100, 10, 10
-    Xmin, Xmax, Ymin, Ymax = -20, 20, -20, 20
-    Zmax, Nx, Ny, Nz = 30, 41, 41, 31
-
-    # Generate hash manually to verify implementation
-    params_str = f"{q}_{Lx}_{Ly}_{Xmin}_{Xmax}_{Ymin}_{Ymax}_{Zmax}_{Nx}_{Ny}_{Nz}"
-    expected_hash = hashlib.md5(params_str.encode()).hexdigest()[:8]
-
-    actual_hash = get_cache_hash(q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz)
-
-    assert actual_hash == expected_hash, "Hash implementation should match expected format"
+    """Test that cache hash is a digest of the packed parameters, stable across processes"""
+    import hashlib
+    import struct
+    params = (100, 10, 10, -20, 20, -20, 20, 30, 41, 41, 31)
+    expected_hash = hashlib.blake2b(struct.pack('<8d3q', *map(float, params[:8]), *params[8:]),
+                                    digest_size=4).hexdigest()
+    assert get_cache_hash(*params) == expected_hash, "Hash implementation should match expected format"
+
+    # Equal numbers of different types name the same cache file
+    assert get_cache_hash(100.0, 10.0, 10.0, -20.0, 20.0, -20.0, 20.0, 30.0, 41, 41, 31) == expected_hash
+
+    # Parameter sets the built-in hash confuses (hash(-1.0) == hash(-2.0)) get distinct names
+    assert get_cache_hash(100, 10, 10, -1, 20, -20, 20, 30, 41, 41, 31) != \
+        get_cache_hash(100, 10, 10, -2, 20, -20, 20, 30, 41, 41, 31)
+
+    # Saved caches are found again by name in later sessions: the hash must not
+    # depend on the per-process hash seed
+    code = f"from calculations import get_cache_hash; print(get_cache_hash(*{params!r}))"
+    for seed in ('1', '2'):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             env={**os.environ, 'PYTHONHASHSEED': seed},
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert out.stdout.strip() == expected_hash
 
 
 def test_compute_boussinesq_cached():
@@ -69,6 +107,72 @@ def test_compute_boussinesq_cached():
     # Check that stress is non-negative for positive load
     assert np.all(sigma >= -1e-10), "Stress should be non-negative"
 
+    # Repeat calls share the cached, read-only arrays instead of copies
+    _, _, _, sigma_again = compute_boussinesq_cached(
+        q, Lx, Ly, Xmin, Xmax, Ymin, Ymax, Zmax, Nx, Ny, Nz
+    )
+    assert sigma_again is sigma, "A cache hit should return the same array"
+    assert not sigma.flags.writeable, "Cached arrays should be read-only"
+
+
+def test_compute_boussinesq_cached_normalizes_arguments(monkeypatch):
+    """Test that numerically equal arguments of different types share one cache entry"""
+    import calculations
+    calls = []
+
+    def fake_compute(*args, backend):
+        calls.append(args + (backend,))
+        return np.zeros(2), np.zeros(2), np.zeros(2), np.zeros((2, 2, 2))
+
+    def clear():
+        calculations._compute_boussinesq.clear()
+        calculations._compute_boussinesq_persisted.clear()
+
+    monkeypatch.setattr(calculations, 'compute_rectangular_boussinesq', fake_compute)
+    clear()
+
+    compute_boussinesq_cached(100, 10, 10, -15, 15, -15, 15, 20, 2, 2, 2)
+    compute_boussinesq_cached(100.0, np.float64(10), 10.0, -15, 15, -15, 15, 20, np.int64(2), 2, 2)
+    clear()
+
+    assert len(calls) == 1, "Equal parameters should be computed only once"
+    assert all(type(v) is float for v in calls[0][:8]) and all(type(v) is int for v in calls[0][8:11])
+    assert calls[0][11] == 'auto', "The GPU is allowed by default"
+    
+    compute_boussinesq_cached(100, 10, 10, -15, 15, -15, 15, 20, 2, 2, 2, use_gpu=False)
+    clear()
+    assert len(calls) == 2 and calls[1][11] == 'cpu', "use_gpu=False should force the CPU"
+
+
+def test_compute_boussinesq_cached_kernel_version(monkeypatch):
+    """Test that the disk-persisted results are keyed on the Tools kernel version"""
+    import calculations
+    from Tools import Tools as ToolsModule
+    calls = []
+
+    def fake_compute(*args, backend):
+        calls.append(args)
+        return np.zeros(2), np.zeros(2), np.zeros(2), np.zeros((2, 2, 2))
+
+    def clear_memory():
+        calculations._compute_boussinesq.clear()
+
+    monkeypatch.setattr(calculations, 'compute_rectangular_boussinesq', fake_compute)
+    clear_memory()
+    calculations._compute_boussinesq_persisted.clear()
+
+    compute_boussinesq_cached(100, 10, 10, -15, 15, -15, 15, 20, 2, 2, 2)
+    clear_memory()
+    compute_boussinesq_cached(100, 10, 10, -15, 15, -15, 15, 20, 2, 2, 2)
+    assert len(calls) == 1, "The same kernel version should reuse the persisted result"
+
+    monkeypatch.setattr(ToolsModule, '_MEMO_VERSION', ToolsModule._MEMO_VERSION + 1)
+    clear_memory()
+    compute_boussinesq_cached(100, 10, 10, -15, 15, -15, 15, 20, 2, 2, 2)
+    clear_memory()
+    calculations._compute_boussinesq_persisted.clear()
+    assert len(calls) == 2, "A kernel version bump should not serve stale results"
+
 
 def test_interpolate_value():
     """Test trilinear interpolation of stress values"""
@@ -105,13 +209,97 @@ def test_interpolate_value_gradient():
     assert 0 < result < 10, f"Interpolated value should be between boundary values, got {result}"
 
 
-def test_create_xz_plot():
+def test_interpolate_value_matches_interpn():
+    """Test the trilinear lookup against scipy's interpn, inside, on and outside the grid"""
+    from scipy.interpolate import interpn
+    rng = np.random.default_rng(0)
+    X = np.linspace(-20, 20, 9)
+    Y = np.linspace(-10, 30, 6)
+    Z = np.linspace(0.3, 30, 7)
+    sigma = rng.random((7, 6, 9)).astype(np.float32) * 100
+
+    points = [(-20, -10, 0.3), (20, 30, 30), (3.7, 12.1, 8.8), (-19.9, 29.9, 0.31),
+              (21, 0, 5), (0, -11, 5), (0, 0, 0.1), (0, 0, 31)]
+    for x, y, z in points:
+        expected = interpn((Z, Y, X), sigma, [[z, y, x]], bounds_error=False, fill_value=0)[0]
+        assert np.isclose(interpolate_value(X, Y, Z, sigma, x, y, z), expected, rtol=1e-6)
+
+
+def test_trilinear_interpolator():
+    """Test that one interpolator answers scalar and array queries like interpolate_value"""
+    X = np.linspace(0, 20, 5)
+    Y = np.linspace(0, 10, 3)
+    Z = np.linspace(1, 9, 4)
+    sigma = np.arange(60, dtype=np.float32).reshape(4, 3, 5)
+    interp = TrilinearInterpolator(X, Y, Z, sigma)
+
+    x = np.array([0.0, 7.5, 20.0, 25.0])
+    y = np.array([0.0, 2.5, 10.0, 5.0])
+    z = np.array([1.0, 4.0, 9.0, 5.0])
+    values = interp(x, y, z)
+    assert values.shape == (4,)
+    for k in range(4):
+        assert values[k] == interpolate_value(X, Y, Z, sigma, x[k], y[k], z[k])
+    assert values[0] == sigma[0, 0, 0] and values[2] == sigma[-1, -1, -1]
+    assert values[3] == 0.0, "Points outside the grid should give 0"
+
+
+def test_trilinear_interpolator_numba_matches_numpy(monkeypatch):
+    """Test that the Numba batch kernel agrees with the NumPy path"""
+    import calculations
+    if not calculations._NUMBA_AVAILABLE:
+        pytest.skip("Numba not installed")
+    rng = np.random.default_rng(2)
+    X = np.linspace(-20, 20, 9)
+    Y = np.linspace(-10, 30, 6)
+    Z = np.linspace(0.3, 30, 7)
+    sigma = rng.random((7, 6, 9)).astype(np.float32) * 100
+    x = np.concatenate([rng.uniform(-25, 25, 200), [np.nan, -20, 20]])
+    y = np.concatenate([rng.uniform(-15, 35, 200), [0, -10, 30]])
+    z = np.concatenate([rng.uniform(0, 32, 200), [5, 0.3, 30]])
+    interp = TrilinearInterpolator(X, Y, Z, sigma)
+
+    values_numba = interp(x, y, z)
+    monkeypatch.setattr(calculations, '_NUMBA_AVAILABLE', False)
+    values_numpy = interp(x, y, z)
+    assert values_numba.shape == values_numpy.shape == (203,)
+    assert np.allclose(values_numba, values_numpy, rtol=1e-12, atol=1e-12)
+
+
+def test_nearest_index_matches_argmin():
+    """Test the O(1) lookup on uniform axes and the fallback on non-uniform ones"""
+    rng = np.random.default_rng(1)
+    axes = [np.linspace(-20, 20, 41), np.linspace(0.3, 30, 31), np.geomspace(0.1, 30, 25),
+            np.array([0.0, 1.0, 1.5, 10.0]), np.array([5.0])]
+    for axis in axes:
+        values = np.concatenate([rng.uniform(axis[0] - 5, axis[-1] + 5, 200), axis,
+                                 (axis[:-1] + axis[1:]) / 2])
+        for v in values:
+            assert nearest_index(axis, v) == int(np.argmin(np.abs(axis - v))), (axis, v)
+
+
+def test_contour_plots_downsample_large_slices():
+    """Test that contour figures keep at most 128 grid lines per axis, ends included"""
+    X = np.linspace(-20, 20, 200)
+    Y = np.linspace(-20, 20, 90)
+    Z = np.linspace(0.3, 30, 150)
+    sigma = np.random.rand(150, 90, 200).astype(np.float32)
+
+    fig = create_xz_plot_idx(X, Y, Z, sigma, 45)
+    z = np.asarray(fig.data[0].z)
+    assert z.shape == (128, 128)
+    assert fig.data[0].x[0] == X[0] and fig.data[0].x[-1] == X[-1]
+    assert fig.data[0].y[0] == Z[0] and fig.data[0].y[-1] == Z[-1]
+    assert z[-1, -1] == sigma[-1, 45, -1]
+
+    fig = create_yz_plot_idx(X, Y, Z, sigma, 10)
+    assert np.asarray(fig.data[0].z).shape == (128, 90), "Axes within the limit are kept whole"
+    assert np.array_equal(fig.data[0].x, Y)
+
+
+def test_create_xz_plot(plot_grid):
     """Test X-Z contour plot creation"""
-    # Create simple test data
-    X = np.linspace(-10, 10, 11)
-    Y = np.linspace(-10, 10, 11)
-    Z = np.linspace(1, 20, 10)
-    sigma = np.random.rand(10, 11, 11) * 100
+    X, Y, Z, sigma = plot_grid
 
     # Create plot at y=0
     fig = create_xz_plot(X, Y, Z, sigma, y_val=0.0)
@@ -128,13 +316,9 @@ def test_create_xz_plot():
         "Y-axis should indicate depth"
 
 
-def test_create_yz_plot():
+def test_create_yz_plot(plot_grid):
     """Test Y-Z contour plot creation"""
-    # Create simple test data
-    X = np.linspace(-10, 10, 11)
-    Y = np.linspace(-10, 10, 11)
-    Z = np.linspace(1, 20, 10)
-    sigma = np.random.rand(10, 11, 11) * 100
+    X, Y, Z, sigma = plot_grid
 
     # Create plot at x=0
     fig = create_yz_plot(X, Y, Z, sigma, x_val=0.0)
@@ -151,13 +335,9 @@ def test_create_yz_plot():
         "Y-axis should indicate depth"
 
 
-def test_create_depth_profile_plot():
+def test_create_depth_profile_plot(plot_grid):
     """Test depth profile plot creation"""
-    # Create simple test data
-    X = np.linspace(-10, 10, 11)
-    Y = np.linspace(-10, 10, 11)
-    Z = np.linspace(1, 20, 10)
-    sigma = np.random.rand(10, 11, 11) * 100
+    X, Y, Z, sigma = plot_grid
 
     # Create depth profile at (0, 0)
     fig = create_depth_profile_plot(X, Y, Z, sigma, x_point=0.0, y_point=0.0)
@@ -176,7 +356,144 @@ def test_create_depth_profile_plot():
         "Y-axis should indicate depth"
 
 
-def test_generate_pdf_report():
+def test_index_plot_builders_match_value_builders():
+    """Test that the index-based builders draw the slice the value-based ones select"""
+    X = np.linspace(-10, 10, 11)
+    Y = np.linspace(-10, 10, 21)
+    Z = np.linspace(1, 20, 10)
+    sigma = np.random.rand(10, 21, 11) * 100
+
+    # 3.4 snaps to X[7] = 4 and to Y[13] = 3
+    assert nearest_index(X, 3.4) == 7 and nearest_index(Y, 3.4) == 13
+    assert isinstance(nearest_index(X, 3.4), int)
+
+    fig_val = create_xz_plot(X, Y, Z, sigma, y_val=3.4)
+    fig_idx = create_xz_plot_idx(X, Y, Z, sigma, 13)
+    assert np.array_equal(fig_val.data[0].z, fig_idx.data[0].z)
+    assert fig_val.layout.title.text == fig_idx.layout.title.text
+
+    fig_val = create_yz_plot(X, Y, Z, sigma, x_val=3.4)
+    fig_idx = create_yz_plot_idx(X, Y, Z, sigma, 7)
+    assert np.array_equal(fig_val.data[0].z, fig_idx.data[0].z)
+
+    fig_val = create_depth_profile_plot(X, Y, Z, sigma, 3.4, 3.4)
+    fig_idx = create_depth_profile_plot_idx(X, Y, Z, sigma, 7, 13)
+    assert np.array_equal(fig_val.data[0].x, sigma[:, 13, 7].astype(np.float32))
+    assert np.array_equal(fig_idx.data[0].x, sigma[:, 13, 7].astype(np.float32))
+
+
+def test_contour_plots_binary_z():
+    """Test that contour slices reach the browser as base64 float32, not JSON floats"""
+    import base64
+    import json
+    X = np.linspace(-20, 20, 41)
+    Y = np.linspace(-20, 20, 31)
+    Z = np.linspace(0.5, 30, 21)
+    sigma = np.random.rand(21, 31, 41)
+
+    for fig, expected in ((create_xz_plot_idx(X, Y, Z, sigma, 15), sigma[:, 15, :]),
+                          (create_yz_plot_idx(X, Y, Z, sigma, 20), sigma[:, :, 20])):
+        z = json.loads(fig.to_json())['data'][0]['z']
+        assert z['dtype'] == 'f4'
+        decoded = np.frombuffer(base64.b64decode(z['bdata']), dtype='<f4').reshape(expected.shape)
+        assert np.array_equal(decoded, expected.astype(np.float32))
+
+
+def test_create_plots_batch():
+    """Test that batched plot building matches building each plot on its own"""
+    X = np.linspace(-10, 10, 11)
+    Y = np.linspace(-10, 10, 21)
+    Z = np.linspace(1, 20, 10)
+    sigma = np.random.rand(10, 21, 11) * 100
+    requests = [("Corte Y-Z", 3, None), ("Corte X-Z", None, 13), ("Perfil en profundidad", 7, 2),
+                ("Corte X-Z", None, 0), ("Perfil en profundidad", 1, 20), ("Corte Y-Z", 10, None)]
+
+    figs = create_plots(X, Y, Z, sigma, requests)
+    assert len(figs) == len(requests)
+    for fig, (plot_type, x_idx, y_idx) in zip(figs, requests):
+        if plot_type == "Corte X-Z":
+            expected = create_xz_plot_idx(X, Y, Z, sigma, y_idx)
+            assert np.array_equal(fig.data[0].z, expected.data[0].z)
+        elif plot_type == "Corte Y-Z":
+            expected = create_yz_plot_idx(X, Y, Z, sigma, x_idx)
+            assert np.array_equal(fig.data[0].z, expected.data[0].z)
+        else:
+            expected = create_depth_profile_plot_idx(X, Y, Z, sigma, x_idx, y_idx)
+            assert np.array_equal(fig.data[0].x, expected.data[0].x)
+        assert fig.layout.title.text == expected.layout.title.text
+        assert np.asarray(fig.data[0].z if plot_type != "Perfil en profundidad" else fig.data[0].x).dtype \
+            == np.float32, "Figures should carry sigma as float32"
+
+    assert create_plots(X, Y, Z, sigma, []) == []
+
+
+def test_create_plots_log_scale():
+    """Test log-scale plots: precomputed log10 of sigma, floored at zero stress, and relabelled"""
+    X = np.linspace(-10, 10, 11)
+    Y = np.linspace(-10, 10, 21)
+    Z = np.linspace(1, 20, 10)
+    sigma = np.random.rand(10, 21, 11).astype(np.float32) * 100
+    sigma[0, 0, 0] = 0.0
+
+    log_sigma = log_stress(sigma)
+    assert log_sigma.dtype == np.float32 and log_sigma.shape == sigma.shape
+    assert np.isfinite(log_sigma).all() and log_sigma[0, 0, 0] == np.float32(-12)
+    assert np.allclose(log_sigma[1:], np.log10(sigma[1:]), rtol=1e-5)
+
+    figs = create_plots(X, Y, Z, log_sigma, [("Corte X-Z", None, 4), ("Perfil en profundidad", 2, 3)],
+                        log_scale=True)
+    assert np.array_equal(figs[0].data[0].z, log_sigma[:, 4, :])
+    assert figs[0].data[0].colorbar.title.text == 'log₁₀ σz (kPa)'
+    assert figs[1].layout.xaxis.title.text == 'log₁₀ σz (kPa)'
+    assert create_plots(X, Y, Z, sigma, [("Corte Y-Z", 5, None)])[0].data[0].colorbar.title.text == 'σz (kPa)'
+
+
+def test_plot_batch_requests():
+    """Test that PlotBatch resolves saved plot configs like nearest_index, per plot type"""
+    X = np.linspace(-10, 10, 11)
+    Y = np.linspace(-10, 10, 21)
+    plots = [{'type': "Corte X-Z", 'y_val': 3.4},
+             {'type': "Corte Y-Z", 'x_val': 3.0},  # tie between X[6] = 2 and X[7] = 4
+             {'type': "Perfil en profundidad", 'x_point': -30.0, 'y_point': 9.6},
+             {'type': "Corte X-Z", 'y_val': -10.0}]
+
+    batch = PlotBatch.from_configs(plots)
+    assert batch.types.dtype == np.int8 and batch.types.tolist() == [0, 1, 2, 0]
+    assert np.isnan(batch.x_vals[0]) and np.isnan(batch.y_vals[1])
+
+    expected = [("Corte X-Z", None, nearest_index(Y, 3.4)),
+                ("Corte Y-Z", nearest_index(X, 3.0), None),
+                ("Perfil en profundidad", nearest_index(X, -30.0), nearest_index(Y, 9.6)),
+                ("Corte X-Z", None, 0)]
+    requests = batch.requests(X, Y)
+    assert requests == expected
+    assert all(type(i) is int for r in requests for i in r[1:] if i is not None)
+    assert PlotBatch.from_configs([]).requests(X, Y) == []
+
+
+def test_render_figures_png_batch(monkeypatch):
+    """Test that all figures are rasterized in a single Kaleido batch"""
+    import calculations
+    if not hasattr(calculations.pio, 'write_images'):
+        pytest.skip("Plotly without the batch image API")
+    batches = []
+
+    def fake_write_images(figs, paths, width, height):
+        batches.append(len(figs))
+        for k, path in enumerate(paths):
+            with open(path, 'wb') as f:
+                f.write(b'png%d' % k)
+
+    monkeypatch.setattr(calculations.importlib.util, 'find_spec', lambda name: object())
+    monkeypatch.setattr(calculations.pio, 'write_images', fake_write_images)
+
+    figs = [go.Figure(), go.Figure(), go.Figure()]
+    assert calculations.render_figures_png(figs) == [b'png0', b'png1', b'png2']
+    assert batches == [3], "One batch call should render every figure"
+    assert calculations.render_figures_png([]) == []
+
+
+def test_generate_pdf_report(report_grid):
     """Test PDF report generation"""
     # Create test parameters
     params = {
@@ -194,10 +511,7 @@ def test_generate_pdf_report():
     }
 
     # Create test data
-    X = np.linspace(-20, 20, 41)
-    Y = np.linspace(-20, 20, 41)
-    Z = np.linspace(1, 30, 31)
-    sigma = np.random.rand(31, 41, 41) * 100
+    X, Y, Z, sigma = report_grid
 
     # Create test plot configuration
     plots_config = [
@@ -216,8 +530,39 @@ def test_generate_pdf_report():
     # Check PDF header (PDF files start with %PDF-)
     assert pdf_bytes[:4] == b'%PDF', "Should be a valid PDF file"
 
+    # Written to a stream instead: same document, nothing returned
+    import io
+    buf = io.BytesIO()
+    assert generate_pdf_report(params, plots_config, X, Y, Z, sigma, stream=buf) is None
+    buf.seek(0)
+    assert buf.read(4) == b'%PDF', "The stream should hold a valid PDF file"
+    assert buf.seek(0, io.SEEK_END) > 0
+
 
-def test_generate_pdf_report_no_plots():
+def test_generate_pdf_report_with_images(report_grid):
+    """Test that PNG images are embedded in the PDF report"""
+    from PIL import Image
+    import io
+
+    params = {'q': 100, 'Lx': 10, 'Ly': 10, 'Xmin': -20, 'Xmax': 20, 'Ymin': -20, 'Ymax': 20,
+              'Zmax': 30, 'Nx': 41, 'Ny': 41, 'Nz': 31}
+    X, Y, Z, sigma = report_grid
+    plots_config = [{'type': 'Corte X-Z', 'y_val': 0.0}, {'type': 'Corte Y-Z', 'x_val': 0.0}]
+
+    buf = io.BytesIO()
+    Image.new('RGB', (80, 50), (30, 120, 200)).save(buf, format='PNG')
+    png = buf.getvalue()
+
+    pdf_plain = generate_pdf_report(params, plots_config, X, Y, Z, sigma)
+    # A missing image (None) is skipped
+    pdf_images = generate_pdf_report(params, plots_config, X, Y, Z, sigma, images=[png, None])
+
+    assert pdf_images[:4] == b'%PDF', "Should be a valid PDF file"
+    assert b'/Subtype /Image' in pdf_images and b'/Subtype /Image' not in pdf_plain, \
+        "The image should be embedded only when given"
+
+
+def test_generate_pdf_report_no_plots(report_grid):
     """Test PDF report generation without plots"""
     params = {
         'q': 100,
@@ -233,10 +578,7 @@ def test_generate_pdf_report_no_plots():
         'Nz': 31
     }
 
-    X = np.linspace(-20, 20, 41)
-    Y = np.linspace(-20, 20, 41)
-    Z = np.linspace(1, 30, 31)
-    sigma = np.random.rand(31, 41, 41) * 100
+    X, Y, Z, sigma = report_grid
 
     # Generate PDF with no plots
     pdf_bytes = generate_pdf_report(params, [], X, Y, Z, sigma)
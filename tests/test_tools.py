@@ -5,7 +5,29 @@ import pytest
 import numpy as np
 import os
 import tempfile
-from Tools import compute_rectangular_boussinesq, save_cache, load_cache, calc_circular_surcharge
+from Tools import (compute_rectangular_boussinesq, compute_rectangular_boussinesq_memoized,
+                   compute_boussinesq_profile, compute_boussinesq_slice_xz, compute_boussinesq_slice_yz,
+                   save_cache, load_cache, calc_circular_surcharge)
+from Tools import Tools as ToolsModule
+
+# Small asymmetric grid shared by the kernel-variant tests (z_block, Numba, backend, out)
+GRID_PARAMS = dict(q=100, Lx=10, Ly=6, Xmin=-12, Xmax=12, Ymin=-9, Ymax=9,
+                   Zmax=15, Nx=13, Ny=10, Nz=6)
+
+
+@pytest.fixture(scope='module')
+def reference_sigma():
+    """Default (superposition) sigma of GRID_PARAMS, keyed by Ymin: -9 mirrors Y, -3 does not
+
+    Computed once, before any test monkeypatches the kernels, and read-only since
+    every test shares it.
+    """
+    refs = {}
+    for Ymin in (-9, -3):
+        _, _, _, sigma = compute_rectangular_boussinesq(**{**GRID_PARAMS, 'Ymin': Ymin})
+        sigma.flags.writeable = False
+        refs[Ymin] = sigma
+    return refs
 
 
 def test_compute_rectangular_boussinesq_basic():
@@ -97,6 +119,146 @@ def test_compute_rectangular_boussinesq_invalid_inputs():
         compute_rectangular_boussinesq(**params)
 
 
+def test_compute_rectangular_boussinesq_z_block(monkeypatch, reference_sigma):
+    """Test that blocked evaluation gives the same result for any block size"""
+    # Force the NumPy fallback, which is the path that honours z_block
+    monkeypatch.setattr(ToolsModule, '_NUMBA_AVAILABLE', False)
+    params = GRID_PARAMS
+    
+    sigma_default = reference_sigma[-9]
+    _, _, _, sigma_single = compute_rectangular_boussinesq(**params, z_block=1)
+    _, _, _, sigma_full = compute_rectangular_boussinesq(**params, z_block=params['Nz'])
+    
+    assert np.allclose(sigma_default, sigma_single), "z_block=1 should not change the result"
+    assert np.allclose(sigma_default, sigma_full), "A single block should not change the result"
+
+
+@pytest.mark.skipif(not ToolsModule._NUMBA_AVAILABLE, reason="Numba not installed")
+@pytest.mark.parametrize("method", ["superposition", "analytic"])
+def test_numba_kernel_matches_numpy(monkeypatch, reference_sigma, method):
+    """Test that the Numba kernels and the NumPy fallbacks agree"""
+    params = dict(GRID_PARAMS, method=method)
+    
+    # The shared reference was computed on the default (Numba) path
+    if method == 'superposition':
+        sigma_numba = reference_sigma[-9]
+    else:
+        _, _, _, sigma_numba = compute_rectangular_boussinesq(**params)
+    monkeypatch.setattr(ToolsModule, '_NUMBA_AVAILABLE', False)
+    _, _, _, sigma_numpy = compute_rectangular_boussinesq(**params)
+    
+    assert np.allclose(sigma_numba, sigma_numpy), "Numba and NumPy paths should agree"
+
+
+def test_compute_rectangular_boussinesq_backend(reference_sigma):
+    """Test backend selection and, when a GPU is present, the CUDA kernel"""
+    params = GRID_PARAMS
+    
+    with pytest.raises(ValueError, match="Backend"):
+        compute_rectangular_boussinesq(**params, backend='opencl')
+    
+    # The grid is below _CUDA_MIN_POINTS, so the default reference ran on the CPU
+    sigma_cpu = reference_sigma[-9]
+    if not ToolsModule._cuda_available():
+        with pytest.raises(RuntimeError, match="CUDA"):
+            compute_rectangular_boussinesq(**params, backend='cuda')
+        return
+    
+    _, _, _, sigma_cuda = compute_rectangular_boussinesq(**params, backend='cuda')
+    assert sigma_cuda.dtype == np.float32
+    assert np.allclose(sigma_cuda, sigma_cpu, rtol=1e-5, atol=1e-4), "CUDA and CPU paths should agree"
+    
+    _, _, _, sigma_cuda = compute_rectangular_boussinesq(**params, method='analytic', backend='cuda')
+    _, _, _, sigma_cpu = compute_rectangular_boussinesq(**params, method='analytic', backend='cpu')
+    assert np.allclose(sigma_cuda, sigma_cpu, rtol=1e-5, atol=1e-4), "CUDA closed form should match the CPU"
+
+
+def test_resolve_backend(monkeypatch):
+    """Test that backend='auto' only moves grids above the size threshold to the GPU"""
+    monkeypatch.setattr(ToolsModule, '_cuda_available', lambda: True)
+    assert ToolsModule._resolve_backend('auto', ToolsModule._CUDA_MIN_POINTS) == 'cpu'
+    assert ToolsModule._resolve_backend('auto', ToolsModule._CUDA_MIN_POINTS + 1) == 'cuda'
+    assert ToolsModule._resolve_backend('cpu', 10**9) == 'cpu'
+    
+    monkeypatch.setattr(ToolsModule, '_cuda_available', lambda: False)
+    assert ToolsModule._resolve_backend('auto', 10**9) == 'cpu'
+
+
+def test_depth_adaptive_subelements_converge():
+    """Test that coarsening the subelements with depth matches a uniform 40 x 40 discretization"""
+    q, Lx, Ly = 100, 10, 6
+    X, Y, Z, sigma = compute_rectangular_boussinesq(q, Lx, Ly, -20, 20, -20, 20, 30, 81, 81, 31)
+    uniform = ToolsModule._superposition(X, Y, Z, Lx, Ly, q, 40, 40)
+    
+    # Deep slices really are coarsened...
+    assert int(np.ceil(ToolsModule._SUBELEMENT_RATIO * Lx / Z[-1])) < 40
+    # ...without losing accuracy anywhere in the grid
+    assert np.allclose(sigma, uniform, rtol=0, atol=1e-3 * q), \
+        "Depth-adaptive subelements should agree with the uniform discretization"
+
+
+def test_compute_rectangular_boussinesq_out_path(reference_sigma):
+    """Test that sigma can be written to and returned as a float32 memmap"""
+    # Symmetric X (mirrored into the memmap) and asymmetric Y (no mirroring)
+    for Ymin in (-9, -3):
+        params = dict(GRID_PARAMS, Ymin=Ymin)
+        expected = reference_sigma[Ymin]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'sigma.dat')
+            for method in ('superposition', 'analytic'):
+                _, _, _, sigma = compute_rectangular_boussinesq(**params, method=method, out_path=path)
+                assert isinstance(sigma, np.memmap), "sigma should be memory-mapped"
+                reopened = np.memmap(path, dtype=np.float32, mode='r', shape=(6, 10, 13))
+                assert np.array_equal(reopened, sigma), "Memmap file should hold the returned sigma"
+                if method == 'superposition':
+                    assert np.array_equal(sigma, expected)
+                del sigma, reopened
+
+
+def test_compute_rectangular_boussinesq_out(reference_sigma):
+    """Test that sigma can be written into a preallocated buffer"""
+    params = dict(GRID_PARAMS, Ymin=-3)
+    for method in ('superposition', 'analytic'):
+        if method == 'superposition':
+            expected = reference_sigma[-3]
+        else:
+            _, _, _, expected = compute_rectangular_boussinesq(**params, method=method)
+        buf = np.full((6, 10, 13), np.nan, dtype=np.float32)
+        _, _, _, sigma = compute_rectangular_boussinesq(**params, method=method, out=buf)
+        assert sigma is buf, "sigma should be the buffer passed as out"
+        assert np.array_equal(sigma, expected)
+    
+    with pytest.raises(ValueError, match="out must be"):
+        compute_rectangular_boussinesq(**params, out=np.empty((6, 10, 13)))
+    with pytest.raises(ValueError, match="out and out_path"):
+        compute_rectangular_boussinesq(**params, out=buf, out_path='sigma.dat')
+
+
+def test_compute_rectangular_boussinesq_analytic():
+    """Test the closed-form (Newmark) method against chart values and superposition"""
+    params = dict(q=100, Lx=10, Ly=10, Xmin=-10, Xmax=10, Ymin=-10, Ymax=10,
+                  Zmax=10, Nx=21, Ny=21, Nz=100)
+    
+    X, Y, Z, sigma = compute_rectangular_boussinesq(**params, method='analytic')
+    assert sigma.shape == (100, 21, 21), "sigma shape mismatch"
+    
+    # Under the center at z = 5 m each quarter rectangle has m = n = 1 -> I = 0.1752
+    iz = np.argmin(np.abs(Z - 5.0))
+    assert np.isclose(Z[iz], 5.0)
+    assert np.isclose(sigma[iz, 10, 10], 4 * 0.1752 * 100, rtol=1e-3), \
+        f"Center stress should match Newmark's chart, got {sigma[iz, 10, 10]}"
+    
+    # Superposition converges to the closed form once z exceeds the subelement size
+    _, _, _, sigma_sup = compute_rectangular_boussinesq(**params)
+    deep = Z >= 5.0
+    assert np.allclose(sigma_sup[deep], sigma[deep], rtol=0.01, atol=0.01 * params['q']), \
+        "Superposition and analytic methods should agree at depth"
+    
+    with pytest.raises(ValueError, match="Method"):
+        compute_rectangular_boussinesq(**params, method='unknown')
+
+
 def test_save_and_load_cache():
     """Test cache saving and loading functionality"""
     # Create test data
@@ -121,10 +283,10 @@ def test_save_and_load_cache():
         
         # Verify loaded data
         assert 'X' in loaded_data and 'Y' in loaded_data and 'Z' in loaded_data and 'sigma' in loaded_data
-        assert np.allclose(loaded_data['X'], X), "X data mismatch after load"
-        assert np.allclose(loaded_data['Y'], Y), "Y data mismatch after load"
-        assert np.allclose(loaded_data['Z'], Z), "Z data mismatch after load"
-        assert np.allclose(loaded_data['sigma'], sigma), "sigma data mismatch after load"
+        assert np.array_equal(loaded_data['X'], X), "X data mismatch after load"
+        assert np.array_equal(loaded_data['Y'], Y), "Y data mismatch after load"
+        assert np.array_equal(loaded_data['Z'], Z), "Z data mismatch after load"
+        assert np.array_equal(loaded_data['sigma'], sigma), "sigma data mismatch after load"
         
     finally:
         # Clean up
@@ -132,6 +294,99 @@ def test_save_and_load_cache():
             os.remove(tmp_path)
 
 
+@pytest.mark.parametrize("compression", ["zip", "none", "zstd"])
+def test_save_and_load_cache_compression(compression):
+    """Test that every compression format round-trips through load_cache"""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    data = {'X': np.linspace(0, 10, 5), 'Y': np.linspace(0, 10, 4),
+            'Z': np.linspace(0.1, 20, 3), 'sigma': np.random.rand(3, 4, 5).astype(np.float32)}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'result.npz')
+        save_cache(path, data, compression=compression)
+        assert os.listdir(tmp_dir) == ['result.npz'], "Cache must be written to the given path only"
+        
+        loaded_data = load_cache(path)
+        for key, value in data.items():
+            assert loaded_data[key].dtype == value.dtype
+            assert np.array_equal(loaded_data[key], value), f"{key} data mismatch after load"
+    
+    with pytest.raises(ValueError, match="Compression"):
+        save_cache('unused.npz', data, compression='gzip')
+
+
+def test_profile_and_slices_match_full_grid():
+    """Test that the profile/slice entry points reproduce the corresponding cube values"""
+    params = dict(q=100, Lx=10, Ly=6, Xmin=-12, Xmax=12, Ymin=-9, Ymax=9, Zmax=15)
+    Nx, Ny, Nz = 13, 10, 6
+    X, Y, Z, sigma = compute_rectangular_boussinesq(**params, Nx=Nx, Ny=Ny, Nz=Nz)
+    q, Lx, Ly = params['q'], params['Lx'], params['Ly']
+    # Same subelements as the full grid
+    sub = dict(mx=min(40, max(4, Nx // 2)), my=min(40, max(4, Ny // 2)))
+    
+    profile = compute_boussinesq_profile(q, Lx, Ly, X[3], Y[7], Z, **sub)
+    assert profile.shape == (Nz,)
+    assert np.allclose(profile, sigma[:, 7, 3], rtol=1e-5)
+    
+    slice_xz = compute_boussinesq_slice_xz(q, Lx, Ly, Y[2], X, Z, **sub)
+    assert slice_xz.shape == (Nz, Nx)
+    assert np.allclose(slice_xz, sigma[:, 2, :], rtol=1e-5)
+    
+    slice_yz = compute_boussinesq_slice_yz(q, Lx, Ly, X[5], Y, Z, **sub)
+    assert slice_yz.shape == (Nz, Ny)
+    assert np.allclose(slice_yz, sigma[:, :, 5], rtol=1e-5)
+    
+    with pytest.raises(ValueError, match="positive depths"):
+        compute_boussinesq_profile(q, Lx, Ly, 0, 0, np.array([0.0, 1.0]))
+    with pytest.raises(ValueError, match="Subelement"):
+        compute_boussinesq_profile(q, Lx, Ly, 0, 0, Z, mx=0)
+    
+    # Tiny caller-supplied depths are clamped instead of hitting the singularity
+    # (a subelement center lies exactly below the origin when mx, my are odd)
+    shallow = compute_boussinesq_profile(q, Lx, Ly, 0, 0, np.array([1e-30, 1.0]), mx=5, my=5)
+    assert np.all(np.isfinite(shallow)), "Clamped depths should give finite stresses"
+
+
+def test_load_cache_mmap():
+    """Test that uncompressed archives are memory-mapped and compressed ones are read"""
+    data = {'X': np.linspace(0, 10, 5), 'Z': np.arange(3, dtype=np.int32),
+            'sigma': np.asfortranarray(np.random.rand(3, 4, 5).astype(np.float32))}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for compression, mapped in (('none', True), ('zip', False)):
+            path = os.path.join(tmp_dir, f'{compression}.npz')
+            save_cache(path, data, compression=compression)
+            loaded_data = load_cache(path, mmap_mode='r')
+            for key, value in data.items():
+                assert isinstance(loaded_data[key], np.memmap) == mapped
+                assert np.array_equal(loaded_data[key], value), f"{key} data mismatch after load"
+            del loaded_data
+        
+        # Atomic writes leave no temporary files behind
+        assert sorted(os.listdir(tmp_dir)) == ['none.npz', 'zip.npz']
+
+
+def test_compute_rectangular_boussinesq_memoized(monkeypatch):
+    """Test that the disk memo stores a result once and reuses it on identical inputs"""
+    params = (100, 6, 4, -12, 12, -9, 9, 15, 9, 8, 5)
+    expected = compute_rectangular_boussinesq(*params)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first = compute_rectangular_boussinesq_memoized(*params, cache_dir=tmp_dir)
+        assert len(os.listdir(tmp_dir)) == 1, "A miss should write exactly one memo file"
+        
+        # A hit must not recompute, even when the inputs differ only in type
+        def fail(*args, **kwargs):
+            raise AssertionError("compute_rectangular_boussinesq called on a cache hit")
+        monkeypatch.setattr(ToolsModule, 'compute_rectangular_boussinesq', fail)
+        second = compute_rectangular_boussinesq_memoized(100.0, *params[1:], cache_dir=tmp_dir)
+        
+        for a, b, c in zip(expected, first, second):
+            assert np.array_equal(a, b) and np.array_equal(a, c)
+        assert len(os.listdir(tmp_dir)) == 1
+
+
 def test_load_cache_nonexistent():
     """Test that loading non-existent cache raises FileNotFoundError"""
     with pytest.raises(FileNotFoundError):
@@ -165,6 +420,27 @@ def test_stress_symmetry():
                 f"Symmetry violation in X at depth {iz}"
 
 
+def test_symmetric_domain_mirroring():
+    """Test that the mirrored half-domain matches a direct evaluation of every point"""
+    q, Lx, Ly, Zmax, Nz = 100, 6, 4, 10, 6
+    # Even and odd point counts exercise both center-line cases
+    for Nx, Ny in [(9, 8), (10, 7)]:
+        X, Y, Z, sigma = compute_rectangular_boussinesq(
+            q, Lx, Ly, -12, 12, -9, 9, Zmax, Nx, Ny, Nz, method='analytic'
+        )
+        expected = ToolsModule._boussinesq_analytic(X, Y, Z, Lx, Ly, q)
+        assert np.allclose(sigma, expected, rtol=1e-5, atol=1e-6), \
+            f"Mirrored result differs from full evaluation for Nx={Nx}, Ny={Ny}"
+        assert np.array_equal(sigma, sigma[:, ::-1, ::-1]), "Mirrored result must be exactly symmetric"
+    
+    # Only the X axis is symmetric here: the Y half must still be computed directly
+    X, Y, Z, sigma = compute_rectangular_boussinesq(
+        q, Lx, Ly, -12, 12, -3, 9, Zmax, 9, 7, Nz, method='analytic'
+    )
+    expected = ToolsModule._boussinesq_analytic(X, Y, Z, Lx, Ly, q)
+    assert np.allclose(sigma, expected, rtol=1e-5, atol=1e-6)
+
+
 def test_calc_circular_surcharge_on_axis():
     """Test circular surcharge calculation on axis (r=0)"""
     q = 100  # kPa
@@ -205,6 +481,24 @@ def test_calc_circular_surcharge_zero_load():
     assert np.allclose(sigma, 0), "Zero load should produce zero stress"
 
 
+def test_calc_circular_surcharge_off_axis():
+    """Test the off-axis integration against the closed form and the point-load limit"""
+    q, radius = 100, 5
+    z_values = np.linspace(2, 30, 15)
+    
+    # Just off the axis the integration must approach the on-axis closed form
+    _, sigma_axis = calc_circular_surcharge(q, radius, 0, 0, z_values)
+    _, sigma_near = calc_circular_surcharge(q, radius, 1e-3, 0, z_values)
+    assert np.allclose(sigma_near, sigma_axis, rtol=0.01), "Off-axis result should be continuous at r=0"
+    
+    # Far from the load it behaves as a point load P = q*pi*R^2
+    x, y, z = 40.0, 30.0, np.array([50.0])
+    _, sigma_far = calc_circular_surcharge(q, radius, x, y, z)
+    P = q * np.pi * radius**2
+    R = np.sqrt(x**2 + y**2 + z**2)
+    assert np.isclose(sigma_far[0], 3 * P * z[0]**3 / (2 * np.pi * R**5), rtol=0.01)
+
+
 def test_calc_circular_surcharge_invalid_inputs():
     """Test that invalid inputs raise appropriate errors"""
     z_values = np.linspace(0.1, 30, 20)